@@ -0,0 +1,70 @@
+'''
+JWT-аутентификация без запроса пользователя из базы.
+
+TokenView кладет в токен доступа имя, роль, is_staff, is_superuser и
+версию пользователя. Версия хранится в кэше так же, как версии ответов
+в api.cache, и увеличивается при каждом изменении пользователя, в том
+числе через QuerySet.update(). Если версия в токене совпадает с текущей,
+пользователь собирается из токена; иначе (роль изменилась, версия
+вытеснена из кэша, токен выдан без claims) пользователь, как обычно,
+загружается из базы. С кэшем в памяти процесса (LocMemCache) отзыв
+токенов не дошел бы до других процессов, поэтому пользователь тогда
+всегда загружается из базы.
+'''
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import bump_versions, get_versions, versions_shared
+
+VERSION_CLAIM = 'ver'
+USER_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+
+
+def token_namespace(user_id):
+    return f'user:{user_id}'
+
+
+def get_token_version(user_id):
+    return get_versions([token_namespace(user_id)])[0]
+
+
+def revoke_tokens(*user_ids):
+    '''Заставляет выданные токены пользователей проверяться по базе.'''
+    bump_versions(*(token_namespace(user_id) for user_id in user_ids))
+
+
+def access_token_for(user):
+    '''Токен доступа с данными пользователя, нужными для прав доступа.'''
+    token = AccessToken.for_user(user)
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = get_token_version(user.pk)
+    return token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    '''
+    Пользователь собирается из claims токена. Остальные поля модели
+    отложены и при обращении загрузятся из базы.
+    '''
+
+    def get_user(self, validated_token):
+        claims = USER_CLAIMS + (VERSION_CLAIM, api_settings.USER_ID_CLAIM)
+        if (not versions_shared()
+                or any(claim not in validated_token for claim in claims)):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if validated_token[VERSION_CLAIM] != get_token_version(user_id):
+            return super().get_user(validated_token)
+        data = {claim: validated_token[claim] for claim in USER_CLAIMS}
+        data[api_settings.USER_ID_FIELD] = user_id
+        data['is_active'] = True
+        # from_db ждет значения в порядке полей модели.
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in data
+        ]
+        return self.user_model.from_db(
+            'default', field_names, [data[name] for name in field_names]
+        )
@@ -0,0 +1,427 @@
+'''
+Массовая запись произведений, жанров и категорий.
+
+Каждый элемент массива проверяется сериализатором без запросов к базе,
+уникальность - одним запросом на весь массив и внутри самого массива.
+Корректные элементы записываются в одной транзакции через bulk_create
+и bulk_update, ошибочные возвращаются в результатах с причиной; если
+ключ успел занять параллельный запрос, конфликтующие элементы
+отбрасываются по ограничению базы, а остальные записываются заново.
+Сигналы моделей при этом не срабатывают, поэтому кэш ответов,
+справочники и статистика обновляются один раз после записи.
+'''
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from reviews import lookups
+from reviews.lookups import prefetch_genre_ids
+from reviews.models import CategoryStats, GenreStats, Title
+from reviews.stats import deferred, refresh_stats
+
+from .cache import bump_versions
+from .serializers import (BulkCategorySerializer, BulkGenreSerializer,
+                          CategorySerializer, GenreSerializer,
+                          TitleCreateSerialaizer, unique_errors,
+                          unique_together_errors)
+
+NOT_FOUND = {'detail': 'Не найдено.'}
+INVALID_ID = {'id': ['Требуется целочисленное значение.']}
+DUPLICATE_ID = {'id': ['Объект уже указан в этом массиве.']}
+
+
+def get_items(data):
+    '''Проверяет, что передан непустой массив не длиннее MAX_ITEMS.'''
+    limit = settings.BULK_WRITE['MAX_ITEMS']
+    if not isinstance(data, list) or not data:
+        raise ValidationError({'detail': 'Ожидается непустой массив.'})
+    if len(data) > limit:
+        raise ValidationError({
+            'detail': f'Не больше {limit} элементов за один запрос.'
+        })
+    return data
+
+
+class BulkResult:
+    '''Результаты по элементам массива в порядке запроса.'''
+
+    def __init__(self, size):
+        self.items = [None] * size
+
+    def ok(self, index, code, **data):
+        self.items[index] = {'index': index, 'status': code, **data}
+
+    def fail(self, index, code, errors):
+        self.items[index] = {'index': index, 'status': code,
+                             'errors': errors}
+
+    def response(self):
+        '''
+        Общий статус ответа: статус всех элементов, если он у них один,
+        207 при частичном успехе и 400, если не записан ни один элемент.
+        '''
+        codes = {item['status'] for item in self.items}
+        if len(codes) == 1:
+            code = codes.pop()
+        elif any(code < status.HTTP_400_BAD_REQUEST for code in codes):
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({'results': self.items}, status=code)
+
+
+def validate(serializer_class, items, result, context, instances=None):
+    '''Элементы, прошедшие проверку сериализатора: [(index, data)].'''
+    valid = []
+    for index, item in enumerate(items):
+        if instances is None:
+            serializer = serializer_class(data=item, context=context)
+        elif index not in instances:
+            continue
+        else:
+            serializer = serializer_class(instances[index], data=item,
+                                          context=context, partial=True)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            result.fail(index, status.HTTP_400_BAD_REQUEST,
+                        serializer.errors)
+    return valid
+
+
+def drop_duplicates(valid, keys, taken, errors, result):
+    '''
+    Убирает элементы, ключ которых уже занят в базе (taken) или
+    встретился раньше в массиве.
+    '''
+    unique = []
+    for (index, data), key in zip(valid, keys):
+        if key in taken:
+            result.fail(index, status.HTTP_400_BAD_REQUEST, errors)
+            continue
+        taken.add(key)
+        unique.append((index, data))
+    return unique
+
+
+def title_key(data, instance=None):
+    def value(name):
+        if name in data:
+            return data[name]
+        return getattr(instance, name, None)
+    return value('name'), value('year'), value('category_id')
+
+
+def taken_title_keys(keys, exclude=()):
+    '''Ключи (name, year, category) из keys, уже занятые в базе.'''
+    keys = set(keys)
+    if not keys:
+        return set()
+    rows = Title.objects.filter(
+        name__in={name for name, _, _ in keys},
+        year__in={year for _, year, _ in keys},
+    ).exclude(pk__in=exclude).values_list('name', 'year', 'category_id')
+    return keys.intersection(rows)
+
+
+def unique_titles(valid, result, instances=None):
+    instances = instances or {}
+    keys = [title_key(data, instances.get(index)) for index, data in valid]
+    exclude = [instance.pk for instance in instances.values()]
+    return drop_duplicates(
+        valid, keys, taken_title_keys(keys, exclude),
+        unique_together_errors(), result,
+    )
+
+
+def conflicting_titles(valid, instances=None):
+    '''Ошибки элементов, ключ которых занят другим произведением.'''
+    instances = instances or {}
+    keys = {
+        index: title_key(data, instances.get(index)) for index, data in valid
+    }
+    owners = {}
+    for pk, *key in Title.objects.filter(
+        name__in={name for name, _, _ in keys.values()},
+        year__in={year for _, year, _ in keys.values()},
+    ).values_list('pk', 'name', 'year', 'category_id'):
+        owners.setdefault(tuple(key), set()).add(pk)
+    return {
+        index: unique_together_errors() for index, key in keys.items()
+        if owners.get(key, set()) - {getattr(instances.get(index), 'pk', None)}
+    }
+
+
+def write_unique(valid, result, write, find_conflicts):
+    '''
+    Выполняет write(valid) в транзакции и возвращает (valid, результат).
+    IntegrityError от параллельно занятого ключа превращается в ошибки
+    у элементов из find_conflicts(valid) ({index: errors}), остальные
+    записываются повторно.
+    '''
+    while valid:
+        try:
+            with transaction.atomic():
+                return valid, write(valid)
+        except IntegrityError:
+            conflicts = find_conflicts(valid)
+            if not conflicts:
+                raise
+        for index, errors in conflicts.items():
+            result.fail(index, status.HTTP_400_BAD_REQUEST, errors)
+        valid = [(index, data) for index, data in valid
+                 if index not in conflicts]
+    return valid, []
+
+
+def assign_title_ids(titles):
+    '''
+    id созданных bulk_create произведений для баз, которые их не
+    возвращают: ключ (name, year, category) уже проверен на уникальность.
+    '''
+    if connection.features.can_return_ids_from_bulk_insert:
+        return
+    ids = {
+        (name, year, category_id): pk
+        for pk, name, year, category_id in Title.objects.filter(
+            name__in={title.name for title in titles},
+            year__in={title.year for title in titles},
+        ).values_list('pk', 'name', 'year', 'category_id')
+    }
+    for title in titles:
+        title.pk = ids[title_key(vars(title))]
+
+
+def set_genre_rows(genre_ids, replace=True):
+    '''Заменяет связи с жанрами у произведений {title_id: [genre_id]}.'''
+    through = Title.genre.through
+    if replace:
+        through.objects.filter(title_id__in=genre_ids).delete()
+    through.objects.bulk_create([
+        through(title_id=title_id, genre_id=genre_id)
+        for title_id, ids in genre_ids.items()
+        for genre_id in dict.fromkeys(ids)
+    ])
+
+
+def create_titles(items, context):
+    result = BulkResult(len(items))
+    valid = unique_titles(
+        validate(TitleCreateSerialaizer, items, result, context), result
+    )
+
+    def write(valid):
+        titles, genre_ids = [], []
+        for _, data in valid:
+            data = dict(data)
+            genre_ids.append(data.pop('genre_ids'))
+            titles.append(Title(**data))
+        Title.objects.bulk_create(titles)
+        assign_title_ids(titles)
+        set_genre_rows({
+            title.pk: ids for title, ids in zip(titles, genre_ids)
+        }, replace=False)
+        refresh_stats(
+            {pk for ids in genre_ids for pk in ids},
+            {title.category_id for title in titles},
+        )
+        return titles
+
+    valid, titles = write_unique(valid, result, write, conflicting_titles)
+    if titles:
+        bump_versions('titles')
+    for (index, _), title in zip(valid, titles):
+        result.ok(index, status.HTTP_201_CREATED, id=title.pk)
+    return result.response()
+
+
+def load_titles(items, result):
+    '''Произведения по полю id элементов: {index: title}.'''
+    ids, seen = {}, set()
+    for index, item in enumerate(items):
+        pk = item.get('id') if isinstance(item, dict) else None
+        if isinstance(pk, bool) or not isinstance(pk, int):
+            result.fail(index, status.HTTP_400_BAD_REQUEST, INVALID_ID)
+        elif pk in seen:
+            result.fail(index, status.HTTP_400_BAD_REQUEST, DUPLICATE_ID)
+        else:
+            ids[index] = pk
+            seen.add(pk)
+    titles = Title.objects.in_bulk(ids.values())
+    prefetch_genre_ids(titles.values())
+    instances = {}
+    for index, pk in ids.items():
+        if pk in titles:
+            instances[index] = titles[pk]
+        else:
+            result.fail(index, status.HTTP_404_NOT_FOUND, NOT_FOUND)
+    return instances
+
+
+def update_titles(items, context):
+    result = BulkResult(len(items))
+    instances = load_titles(items, result)
+    valid = unique_titles(
+        validate(TitleCreateSerialaizer, items, result, context,
+                 instances),
+        result, instances,
+    )
+    now = timezone.now()
+    # Категории до изменения: при повторной записи поля уже изменены.
+    loaded = {index: title.category_id for index, title in instances.items()}
+
+    def write(valid):
+        titles, fields, genre_ids = [], {'updated'}, {}
+        genres, categories = set(), set()
+        for index, data in valid:
+            title = instances[index]
+            data = dict(data)
+            if 'genre_ids' in data:
+                genre_ids[title.pk] = data.pop('genre_ids')
+                genres.update(title.genre_ids, genre_ids[title.pk])
+            category_id = data.get('category_id', loaded[index])
+            if category_id != loaded[index]:
+                categories.update((loaded[index], category_id))
+            for name, value in data.items():
+                setattr(title, name, value)
+            title.updated = now
+            fields.update(data)
+            titles.append(title)
+        Title.objects.bulk_update(titles, fields)
+        set_genre_rows(genre_ids)
+        refresh_stats(genres, categories)
+        return titles
+
+    valid, titles = write_unique(
+        valid, result, write,
+        partial(conflicting_titles, instances=instances),
+    )
+    if titles:
+        bump_versions('titles', *(f'title:{title.pk}' for title in titles))
+    for index, _ in valid:
+        result.ok(index, status.HTTP_200_OK, id=instances[index].pk)
+    return result.response()
+
+
+def delete_titles(items):
+    result = BulkResult(len(items))
+    ids = {}
+    for index, pk in enumerate(items):
+        if isinstance(pk, bool) or not isinstance(pk, int):
+            result.fail(index, status.HTTP_400_BAD_REQUEST, INVALID_ID)
+        else:
+            ids[index] = pk
+    existing = dict(Title.objects.filter(
+        pk__in=ids.values()
+    ).values_list('pk', 'category_id'))
+    genres = set(Title.genre.through.objects.filter(
+        title_id__in=existing
+    ).values_list('genre_id', flat=True))
+    if existing:
+        with transaction.atomic(), deferred():
+            Title.objects.filter(pk__in=existing).delete()
+            refresh_stats(genres, set(existing.values()))
+    for index, pk in ids.items():
+        if pk in existing:
+            result.ok(index, status.HTTP_204_NO_CONTENT, id=pk)
+        else:
+            result.fail(index, status.HTTP_404_NOT_FOUND, NOT_FOUND)
+    return result.response()
+
+
+GROUPS = {
+    'genres': (GenreSerializer, BulkGenreSerializer, GenreStats),
+    'categories': (CategorySerializer, BulkCategorySerializer,
+                   CategoryStats),
+}
+
+
+def taken_group_values(model, field, values):
+    return set(model.objects.filter(
+        **{f'{field}__in': values}
+    ).values_list(field, flat=True))
+
+
+def conflicting_groups(serializer_class, valid):
+    '''Ошибки элементов, slug или имя которых уже заняты в базе.'''
+    model = serializer_class.Meta.model
+    conflicts = {}
+    for field in ('slug', 'name'):
+        taken = taken_group_values(
+            model, field, [data[field] for _, data in valid]
+        )
+        for index, data in valid:
+            if data[field] in taken:
+                conflicts.setdefault(
+                    index, unique_errors(serializer_class, field)
+                )
+    return conflicts
+
+
+def create_groups(namespace, items, context):
+    '''Массовое создание жанров (namespace='genres') или категорий.'''
+    serializer_class, bulk_serializer_class, stats_model = GROUPS[namespace]
+    model = serializer_class.Meta.model
+    result = BulkResult(len(items))
+    valid = validate(bulk_serializer_class, items, result, context)
+    for field in ('slug', 'name'):
+        values = [data[field] for _, data in valid]
+        valid = drop_duplicates(
+            valid, values, taken_group_values(model, field, values),
+            unique_errors(serializer_class, field), result,
+        )
+
+    def write(valid):
+        groups = [model(**data) for _, data in valid]
+        model.objects.bulk_create(groups)
+        if not connection.features.can_return_ids_from_bulk_insert:
+            ids = dict(model.objects.filter(
+                slug__in=[group.slug for group in groups]
+            ).values_list('slug', 'pk'))
+            for group in groups:
+                group.pk = ids[group.slug]
+        stats_model.objects.bulk_create(
+            [stats_model(pk=group.pk) for group in groups]
+        )
+        return groups
+
+    valid, groups = write_unique(
+        valid, result, write, partial(conflicting_groups, serializer_class)
+    )
+    if groups:
+        lookups.invalidate(model)
+        bump_versions(namespace, 'titles')
+    for (index, _), group in zip(valid, groups):
+        result.ok(index, status.HTTP_201_CREATED, slug=group.slug)
+    return result.response()
+
+
+def delete_groups(namespace, items):
+    '''Массовое удаление жанров или категорий по slug.'''
+    model = GROUPS[namespace][0].Meta.model
+    result = BulkResult(len(items))
+    slugs = {}
+    for index, slug in enumerate(items):
+        if not isinstance(slug, str):
+            result.fail(index, status.HTTP_400_BAD_REQUEST,
+                        {'slug': ['Требуется строка.']})
+        else:
+            slugs[index] = slug
+    existing = set(model.objects.filter(
+        slug__in=slugs.values()
+    ).values_list('slug', flat=True))
+    if existing:
+        # Статистика удаляется каскадом, связи произведений - одним
+        # запросом; кэш и справочник сбрасывают сигналы удаления.
+        model.objects.filter(slug__in=existing).delete()
+    for index, slug in slugs.items():
+        if slug in existing:
+            result.ok(index, status.HTTP_204_NO_CONTENT, slug=slug)
+        else:
+            result.fail(index, status.HTTP_404_NOT_FOUND, NOT_FOUND)
+    return result.response()
@@ -0,0 +1,132 @@
+'''
+Кэш ответов для справочных эндпоинтов только на чтение.
+
+Ключ ответа строится из пути, параметров запроса, класса аутентификации
+и версий пространств имен, от которых ответ зависит. При записи версия
+пространства увеличивается, и старые ключи просто перестают читаться,
+поэтому перебирать и удалять их не нужно.
+'''
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.response import Response
+
+VERSION_KEY = 'response-cache:version:{}'
+STATS_KEY = 'response-cache:stats:{}'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE['CACHE_ALIAS']]
+
+
+def versions_shared():
+    '''
+    Видны ли версии всем процессам. В LocMemCache они свои у каждого
+    процесса, и увеличение версии в одном процессе другие не замечают.
+    '''
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def _initial_version():
+    # Версия, потерянная при вытеснении из кэша, не должна совпасть
+    # ни с одной из выданных раньше.
+    return int(time.time() * 1000)
+
+
+def get_versions(namespaces):
+    cache = get_cache()
+    keys = sorted(VERSION_KEY.format(namespace) for namespace in namespaces)
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*namespaces):
+    '''Инвалидирует все закэшированные ответы указанных пространств имен.'''
+    cache = get_cache()
+    for namespace in namespaces:
+        key = VERSION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+
+
+def _count(event):
+    cache = get_cache()
+    key = STATS_KEY.format(event)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    return {
+        event: cache.get(STATS_KEY.format(event), 0)
+        for event in ('hit', 'miss')
+    }
+
+
+class CachedResponseMixin:
+    '''
+    Кэширует ответы list вьюсета; другие действия на чтение можно
+    обернуть в `cached_response` явно.
+
+    `cache_namespaces` перечисляет пространства имен, при изменении
+    которых закэшированные ответы становятся недействительными.
+    '''
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def get_cache_key_parts(self):
+        '''
+        Дополнительные части ключа: версии данных, которые читаются из
+        базы и поэтому одинаковы во всех процессах.
+        '''
+        return ()
+
+    def get_response_cache_key(self, request):
+        user = request.user
+        if user.is_authenticated:
+            auth = type(request.successful_authenticator).__name__
+        else:
+            auth = 'anonymous'
+        query = sorted(request.query_params.lists())
+        versions = get_versions(self.get_cache_namespaces())
+        parts = self.get_cache_key_parts()
+        raw = f'{request.path}|{query}|{auth}|{versions}|{parts}'
+        return 'response-cache:' + hashlib.md5(raw.encode()).hexdigest()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not settings.RESPONSE_CACHE['ENABLED']:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _count('hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        _count('miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data,
+                      timeout=settings.RESPONSE_CACHE['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
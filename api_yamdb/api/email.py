@@ -1,12 +1,24 @@
 from django.conf import settings
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+
+from notifications.outbox import enqueue_email
+from user.confirmation import issue_code
 
 
 def send_confirmation_code(user):
-    confirmation_code = default_token_generator.make_token(user)
+    '''Ставит письмо с кодом подтверждения в очередь на отправку.'''
+    confirmation_code = issue_code(user)
     subject = 'Код подтверждения YaMDb'
     message = f'{confirmation_code} - ваш код для авторизации на YaMDb'
     admin_email = settings.ADMIN_EMAIL
     user_email = [user.email]
-    return send_mail(subject, message, admin_email, user_email)
+    return enqueue_email(subject, message, user_email, admin_email)
+
+
+def send_moderation_notice(review, deleted=False):
+    '''Ставит в очередь уведомление автору об изменении его отзыва.'''
+    action = 'удален' if deleted else 'изменен'
+    subject = 'Ваш отзыв на YaMDb отредактирован'
+    message = (f'Ваш отзыв на произведение «{review.title.name}» '
+               f'{action} модератором.')
+    return enqueue_email(subject, message, [review.author.email],
+                         settings.ADMIN_EMAIL)
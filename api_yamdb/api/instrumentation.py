@@ -0,0 +1,172 @@
+'''
+Замеры запросов к API: число и время SQL-запросов, время рендеринга
+ответа и полное время обработки по каждому действию вьюсета
+(например, `TitleViewSet.list`).
+
+Значения копятся в гистограммах в памяти процесса, поэтому при
+нескольких рабочих процессах у каждого свои данные. Middleware
+включается настройкой INSTRUMENTATION['ENABLED'], без нее Django
+исключает его из цепочки и накладных расходов нет.
+'''
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+# Границы корзин: миллисекунды для времени и штуки для запросов.
+MS_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+COUNT_BOUNDS = (0, 1, 2, 3, 4, 5, 10, 20, 50, 100, 200, 500, 1000)
+METRICS = {
+    'total_ms': MS_BOUNDS,
+    'db_ms': MS_BOUNDS,
+    'render_ms': MS_BOUNDS,
+    'db_queries': COUNT_BOUNDS,
+}
+PERCENTILES = (50, 90, 99)
+
+
+class Histogram:
+    '''
+    Гистограмма с фиксированными корзинами. Перцентиль оценивается
+    верхней границей корзины, в которую он попал, но не больше
+    наибольшего наблюдения.
+    '''
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.lock = threading.Lock()
+
+    def add(self, value):
+        with self.lock:
+            self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                if index == len(self.bounds):
+                    return self.max
+                return min(self.bounds[index], self.max)
+        return self.max
+
+    def summary(self):
+        with self.lock:
+            result = {
+                'count': self.count,
+                'mean': round(self.total / self.count, 2)
+                if self.count else None,
+                'max': round(self.max, 2),
+            }
+            for percent in PERCENTILES:
+                value = self.percentile(percent)
+                result[f'p{percent}'] = (
+                    round(value, 2) if value is not None else None
+                )
+            return result
+
+
+_histograms = {}
+_registry_lock = threading.Lock()
+
+
+def record(label, values):
+    with _registry_lock:
+        histograms = _histograms.get(label)
+        if histograms is None:
+            histograms = _histograms[label] = {
+                metric: Histogram(bounds)
+                for metric, bounds in METRICS.items()
+            }
+    for metric, value in values.items():
+        histograms[metric].add(value)
+
+
+def get_stats():
+    '''Перцентили по всем действиям, отсортированные по имени.'''
+    with _registry_lock:
+        items = sorted(_histograms.items())
+    return {
+        label: {
+            metric: histogram.summary()
+            for metric, histogram in histograms.items()
+        }
+        for label, histograms in items
+    }
+
+
+def reset():
+    with _registry_lock:
+        _histograms.clear()
+
+
+def view_label(view_func, method):
+    '''`Класс.действие` для DRF, путь к функции для остальных вью.'''
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryTimer:
+    '''execute_wrapper, считающий запросы и их суммарное время.'''
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.monotonic() - started
+
+
+class InstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.monotonic()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        finished = time.monotonic()
+        label = getattr(request, 'instrumentation_label', None)
+        if label is not None:
+            rendered = getattr(request, 'instrumentation_render', finished)
+            record(label, {
+                'total_ms': (finished - started) * 1000,
+                'db_ms': timer.seconds * 1000,
+                'render_ms': (finished - rendered) * 1000,
+                'db_queries': timer.queries,
+            })
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.instrumentation_label = view_label(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        # Ответ DRF рендерится сразу после этого вызова.
+        request.instrumentation_render = time.monotonic()
+        return response
@@ -1,8 +1,51 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import mixins, viewsets
 
+from .cache import get_versions
+
 
 class CreateDeleteListViewSet(mixins.CreateModelMixin,
                               mixins.DestroyModelMixin,
                               mixins.ListModelMixin,
                               viewsets.GenericViewSet):
     pass
+
+
+class ConditionalGetMixin:
+    '''
+    Отдает ETag и Last-Modified и отвечает 304 на условные GET-запросы.
+
+    Версия ответа берется из `get_last_modified` (одно поле одной строки),
+    поэтому при совпадении версии не выполняются ни выборка данных,
+    ни сериализация. `etag_namespaces` добавляет к ETag версии кэша
+    связанных справочников.
+    '''
+    etag_namespaces = ()
+
+    def get_last_modified(self):
+        '''None - ответ без условной обработки.'''
+        return None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        last_modified = self.get_last_modified()
+        if last_modified is None:
+            return handler(request, *args, **kwargs)
+        query = sorted(request.query_params.lists())
+        raw = f'{request.path}|{query}|{last_modified.isoformat()}|' \
+              f'{get_versions(self.etag_namespaces)}'
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        timestamp = timegm(last_modified.utctimetuple())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        return response
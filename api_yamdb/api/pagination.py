@@ -0,0 +1,172 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPaginationMixin:
+    '''
+    Необязательный режим пагинации по ключу сортировки (keyset).
+
+    Включается параметром `cursor` в запросе (`?cursor=` для первой
+    страницы). Вместо OFFSET следующая страница выбирается условием
+    "строки после последнего ключа", поэтому глубокие страницы стоят
+    столько же, сколько первая. Поля `keyset_ordering` должны давать
+    уникальный порядок и не содержать NULL. Без параметра `cursor`
+    работает обычная пагинация родительского класса.
+    '''
+    keyset_ordering = ('id',)
+    cursor_query_param = 'cursor'
+    keyset_page_size = api_settings.PAGE_SIZE
+    keyset_size_query_param = 'limit'
+    count_query_param = 'count'
+    max_keyset_page_size = 100
+    approximate_count_limit = 1000
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_mode = self.cursor_query_param in request.query_params
+        if not self.keyset_mode:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        ordering = getattr(view, 'keyset_ordering', self.keyset_ordering)
+        self.fields = [
+            (field.lstrip('-'), field.startswith('-')) for field in ordering
+        ]
+        key, reverse = self.decode_cursor(
+            request.query_params[self.cursor_query_param]
+        )
+        if key is not None:
+            key = self.parse_key(queryset.model, key)
+        size = self.get_keyset_page_size(request)
+        self.count = self.get_keyset_count(queryset, request)
+
+        ordering = [
+            f'-{name}' if descending != reverse else name
+            for name, descending in self.fields
+        ]
+        queryset = queryset.order_by(*ordering)
+        if key is not None:
+            queryset = queryset.filter(self.after_key(key, reverse))
+        rows = list(queryset[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        first_page = key is None and not reverse
+        self.next_key = self.previous_key = None
+        if rows:
+            if has_more or reverse:
+                self.next_key = self.get_key(rows[-1])
+            if (has_more and reverse) or not (reverse or first_page):
+                self.previous_key = self.get_key(rows[0])
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_cursor_link(self.next_key, False)),
+            ('previous', self.get_cursor_link(self.previous_key, True)),
+            ('results', data),
+        ]))
+
+    def get_keyset_page_size(self, request):
+        try:
+            size = int(request.query_params[self.keyset_size_query_param])
+        except (KeyError, ValueError):
+            return self.keyset_page_size
+        if size <= 0:
+            return self.keyset_page_size
+        return min(size, self.max_keyset_page_size)
+
+    def get_keyset_count(self, queryset, request):
+        '''
+        Количество объектов считается только по запросу: `count=exact`
+        дает точное значение, `count=approx` ограничивает подсчет
+        `approximate_count_limit` строками.
+        '''
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'approx':
+            return queryset.order_by()[:self.approximate_count_limit].count()
+        return None
+
+    def after_key(self, key, reverse):
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': key[index]})
+            for position, (previous, _) in enumerate(self.fields[:index]):
+                step &= Q(**{previous: key[position]})
+            condition |= step
+        return condition
+
+    def get_key(self, obj):
+        return [getattr(obj, name) for name, _ in self.fields]
+
+    def encode_cursor(self, key, reverse):
+        payload = json.dumps(
+            {'k': key, 'r': int(reverse)},
+            default=lambda value: value.isoformat(),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            key, reverse = payload['k'], bool(payload['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(key, list) or len(key) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return key, reverse
+
+    def parse_key(self, model, key):
+        '''
+        Приводит значения ключа из курсора к типам полей модели: курсор
+        приходит от клиента и может быть подделан.
+        '''
+        values = []
+        for value, (name, _) in zip(key, self.fields):
+            if value is None or isinstance(value, (dict, list)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                value = model._meta.get_field(name).to_python(value)
+            except (ValueError, TypeError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def get_cursor_link(self, key, reverse):
+        if key is None:
+            return None
+        url = self.request.build_absolute_uri()
+        for param in ('page', 'offset'):
+            url = remove_query_param(url, param)
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(key, reverse))
+
+
+class TitlePagination(KeysetPaginationMixin, PageNumberPagination):
+    keyset_ordering = ('name', 'id')
+
+
+class PubDatePagination(KeysetPaginationMixin, LimitOffsetPagination):
+    keyset_ordering = ('pub_date', 'id')
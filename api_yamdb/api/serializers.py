@@ -1,12 +1,67 @@
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.lookups import CATEGORIES, GENRES, prefetch_genre_ids
+from reviews.models import (Category, CategoryStats, Comment, Genre,
+                            GenreStats, Review, Title)
 from user.models import User
 
 
+class LookupMixin:
+    """Один снимок справочника на весь ответ"""
+
+    def __init__(self, table, **kwargs):
+        self.table = table
+        super().__init__(**kwargs)
+
+    def get_snapshot(self):
+        snapshots = self.context.setdefault('lookup_snapshots', {})
+        if self.table not in snapshots:
+            snapshots[self.table] = self.table.get()
+        return snapshots[self.table]
+
+
+class LookupField(LookupMixin, serializers.Field):
+    """Запись справочника по id без запроса к базе"""
+
+    def to_representation(self, value):
+        return self.get_snapshot().by_id.get(value)
+
+
+class LookupListField(LookupMixin, serializers.Field):
+    """Записи справочника по списку id в порядке сортировки модели"""
+
+    def to_representation(self, value):
+        snapshot = self.get_snapshot()
+        return [snapshot.by_id[pk] for pk in snapshot.sorted_ids(value)]
+
+
+class LookupSlugField(LookupMixin, serializers.Field):
+    """slug во входных данных и в ответе, id во внутреннем значении"""
+    default_error_messages = {
+        'does_not_exist': 'Объект с slug={value} не существует.',
+        'invalid': 'Недопустимое значение.',
+    }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        pk = self.get_snapshot().by_slug.get(data)
+        if pk is None:
+            self.fail('does_not_exist', value=data)
+        return pk
+
+    def to_representation(self, value):
+        row = self.get_snapshot().by_id.get(value)
+        return row['slug'] if row else None
+
+
 class SignUpSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -23,6 +78,17 @@ class SignUpSerializer(serializers.ModelSerializer):
         if if_email.exists():
             raise ValidationError('Почта уже использовалась')
 
+    @classmethod
+    def for_signup(cls, data):
+        """
+        Повторная регистрация с теми же username и email проверяется
+        относительно существующего пользователя, чтобы выдать ему новый код
+        """
+        user = User.objects.filter(
+            username=data.get('username'), email=data.get('email')
+        ).first()
+        return cls(user, data=data)
+
     def validate_username(self, value):
         if value == 'me':
             raise serializers.ValidationError(
@@ -117,6 +183,34 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
 
 
+REVIEW_EXISTS = 'Оставлять отзыв на одно произведение дважды запрещено!'
+TITLE_UNIQUE_FIELDS = ('name', 'year', 'category')
+
+
+def unique_together_errors(field_names=TITLE_UNIQUE_FIELDS):
+    """Ошибка UniqueTogetherValidator в том же виде, что и у сериализатора"""
+    message = UniqueTogetherValidator.message.format(
+        field_names=', '.join(field_names)
+    )
+    return {api_settings.NON_FIELD_ERRORS_KEY: [message]}
+
+
+@contextmanager
+def unique_write(conflicts, errors):
+    """
+    Запись, уникальность которой проверяет ограничение базы. Запись идет
+    в точке сохранения, чтобы после IntegrityError транзакция запроса
+    оставалась рабочей; если ключ занят (conflicts), возвращается 400.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError:
+        if not conflicts.exists():
+            raise
+        raise ValidationError(errors)
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
@@ -127,29 +221,32 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date',)
 
-    def validate(self, data):
-        if self.context.get('request').method != 'POST':
-            return data
-        reviewer = self.context.get('request').user
-        title_id = self.context.get('view').kwargs['title_id']
-        if Review.objects.filter(author=reviewer, title__id=title_id).exists():
-            raise serializers.ValidationError(
-                'Оставлять отзыв на одно произведение дважды запрещено!'
-            )
-        return data
+    def create(self, validated_data):
+        conflicts = Review.objects.filter(author=validated_data['author'],
+                                          title=validated_data['title'])
+        errors = {api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_EXISTS]}
+        with unique_write(conflicts, errors):
+            return super().create(validated_data)
+
+
+class TitleListSerializer(serializers.ListSerializer):
+    """Загружает жанры всей страницы одним запросом"""
+
+    def to_representation(self, data):
+        titles = list(data.all() if hasattr(data, 'all') else data)
+        prefetch_genre_ids(titles)
+        return super().to_representation(titles)
 
 
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор для заголовков"""
-    genre = GenreSerializer(many=True, required=True,)
-    category = CategorySerializer(many=False, read_only=True)
-    rating = serializers.FloatField(
-        source='reviews__score__avg',
-        read_only=True
-    )
+    genre = LookupListField(GENRES, source='genre_ids', read_only=True)
+    category = LookupField(CATEGORIES, source='category_id', read_only=True)
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
+        list_serializer_class = TitleListSerializer
         fields = (
             'id', 'name', 'year', 'rating', 'description', 'genre',
             'category',
@@ -158,15 +255,14 @@ class TitleSerializer(serializers.ModelSerializer):
 
 class TitleCreateSerialaizer(serializers.ModelSerializer):
     """Сериализатор для создания заголовков"""
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
-        many=True,
-        queryset=Genre.objects.all(),
+    genre = serializers.ListField(
+        child=LookupSlugField(GENRES),
+        source='genre_ids',
         required=True,
     )
-    category = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Category.objects.all(),
+    category = LookupSlugField(
+        CATEGORIES,
+        source='category_id',
         required=True,
     )
 
@@ -174,10 +270,131 @@ class TitleCreateSerialaizer(serializers.ModelSerializer):
         model = Title
         fields = ('id', 'name', 'year', 'description', 'genre', 'category',)
         read_only_fields = ('genre', 'category', )
+        # Уникальность (name, year, category) проверяет ограничение
+        # unique_name_year_category при записи, без отдельного запроса.
+        validators = []
+
+    def unique_write(self, data, instance=None):
+        key = {
+            name: data[name] if name in data else getattr(instance, name)
+            for name in ('name', 'year', 'category_id')
+        }
+        conflicts = Title.objects.filter(**key)
+        if instance is not None:
+            conflicts = conflicts.exclude(pk=instance.pk)
+        return unique_write(conflicts, unique_together_errors())
+
+    def create(self, validated_data):
+        genre_ids = validated_data.pop('genre_ids')
+        with self.unique_write(validated_data):
+            title = super().create(validated_data)
+        self.set_genres(title, genre_ids)
+        return title
+
+    def update(self, instance, validated_data):
+        genre_ids = validated_data.pop('genre_ids', None)
+        with self.unique_write(validated_data, instance):
+            title = super().update(instance, validated_data)
+        if genre_ids is not None:
+            self.set_genres(title, genre_ids)
+        return title
+
+    def set_genres(self, title, genre_ids):
+        # Аналог title.genre.set(), который не читает таблицу жанров:
+        # текущие связи берутся из связующей таблицы.
+        genre_ids = list(dict.fromkeys(genre_ids))
+        current = set(Title.genre.through.objects.filter(
+            title_id=title.pk
+        ).values_list('genre_id', flat=True))
+        removed = current.difference(genre_ids)
+        if removed:
+            title.genre.remove(*removed)
+        added = [pk for pk in genre_ids if pk not in current]
+        if added:
+            title.genre.add(*added)
+        title.genre_ids = genre_ids
+
+
+def unique_errors(serializer_class, field_name):
+    """Ошибка UniqueValidator поля в том же виде, что и у сериализатора"""
+    for validator in serializer_class().fields[field_name].validators:
+        if isinstance(validator, UniqueValidator):
+            return {field_name: [validator.message]}
+
+
+class BulkCategorySerializer(CategorySerializer):
+    """Категория в массовой записи, уникальность проверяет api.bulk"""
+    slug = serializers.CharField(allow_blank=False)
+
+    class Meta(CategorySerializer.Meta):
+        extra_kwargs = {'name': {'validators': []}}
+
+
+class BulkGenreSerializer(GenreSerializer):
+    """Жанр в массовой записи, уникальность проверяет api.bulk"""
+    slug = serializers.CharField(allow_blank=False)
+
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {'name': {'validators': []}}
+
+
+def load_top_titles(ids):
+    return {
+        title['id']: title for title in Title.objects.filter(
+            pk__in=ids
+        ).values('id', 'name', 'year', 'rating')
+    }
+
+
+class TitleStatsListSerializer(serializers.ListSerializer):
+    """Загружает лучшие произведения всей страницы одним запросом"""
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, 'all') else data)
+        self.context['top_titles'] = load_top_titles(
+            {pk for stats in rows for pk in stats.top_title_ids}
+        )
+        return super().to_representation(rows)
 
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Title.objects.all(),
-                fields=('name', 'year', 'category',)
-            )
-        ]
+
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Общая часть статистики жанров и категорий"""
+    top_titles = serializers.SerializerMethodField()
+
+    class Meta:
+        fields = ('titles_count', 'reviews_count', 'rating', 'top_titles')
+        list_serializer_class = TitleStatsListSerializer
+
+    def get_top_titles(self, stats):
+        titles = self.context.get('top_titles')
+        if titles is None:
+            titles = load_top_titles(stats.top_title_ids)
+        return [titles[pk] for pk in stats.top_title_ids if pk in titles]
+
+
+class GenreStatsSerializer(TitleStatsSerializer):
+    """Сериализатор для статистики жанров"""
+    genre = LookupField(GENRES, source='genre_id', read_only=True)
+
+    class Meta(TitleStatsSerializer.Meta):
+        model = GenreStats
+        fields = ('genre', *TitleStatsSerializer.Meta.fields)
+
+
+class CategoryStatsSerializer(TitleStatsSerializer):
+    """Сериализатор для статистики категорий"""
+    category = LookupField(CATEGORIES, source='category_id', read_only=True)
+
+    class Meta(TitleStatsSerializer.Meta):
+        model = CategoryStats
+        fields = ('category', *TitleStatsSerializer.Meta.fields)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """Сериализатор для результатов поиска"""
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField()
+    name = serializers.CharField()
+    snippet = serializers.CharField()
+    rank = serializers.FloatField()
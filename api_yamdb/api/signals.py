@@ -0,0 +1,60 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Review, Title
+from user.models import User, users_updated
+
+from .authentication import revoke_tokens
+from .cache import bump_versions
+
+
+def bump_on_commit(*namespaces):
+    '''
+    Версии меняются после фиксации транзакции: иначе параллельный запрос
+    успел бы закэшировать под новой версией еще не записанные данные.
+    '''
+    transaction.on_commit(partial(bump_versions, *namespaces))
+
+
+@receiver((post_save, post_delete), sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_on_commit('categories', 'titles')
+
+
+@receiver((post_save, post_delete), sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    bump_on_commit('genres', 'titles')
+
+
+@receiver((post_save, post_delete), sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    bump_on_commit('titles', f'title:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_on_commit('titles', f'title:{instance.pk}')
+    else:
+        bump_on_commit('titles', *(f'title:{pk}' for pk in pk_set or ()))
+
+
+@receiver((post_save, post_delete), sender=Review)
+def invalidate_review_title(sender, instance, **kwargs):
+    bump_on_commit('titles', f'title:{instance.title_id}')
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    transaction.on_commit(partial(revoke_tokens, instance.pk))
+
+
+@receiver(users_updated, sender=User)
+def invalidate_updated_user_tokens(sender, user_ids, **kwargs):
+    transaction.on_commit(partial(revoke_tokens, *user_ids))
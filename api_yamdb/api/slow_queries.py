@@ -0,0 +1,149 @@
+'''
+Журнал медленных SQL-запросов.
+
+При включенной настройке SLOW_QUERY_LOG['ENABLED'] каждому новому
+соединению с базой добавляется execute_wrapper. Запрос дольше
+THRESHOLD_MS записывается строкой JSON в ротируемый файл вместе с
+вьюсетом и действием, которые его выполнили, ближайшими строками кода
+проекта и планом запроса (EXPLAIN) для SELECT. Когда журнал выключен,
+обертка не устанавливается вовсе.
+'''
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+CALL_SITE_FRAMES = 5
+
+_state = threading.local()
+
+
+def view_label():
+    '''`Класс.действие` вьюсета DRF, который сейчас выполняется.'''
+    for frame, _ in traceback.walk_stack(None):
+        view = frame.f_locals.get('self')
+        if isinstance(view, APIView):
+            action = getattr(view, 'action', None)
+            request = getattr(view, 'request', None)
+            if action is None and request is not None:
+                action = request.method.lower()
+            return f'{type(view).__name__}.{action}'
+    return None
+
+
+def call_site():
+    '''Последние строки кода проекта, приведшие к запросу.'''
+    frames = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return [
+        f'{os.path.relpath(frame.filename, settings.BASE_DIR)}:'
+        f'{frame.lineno} in {frame.name}'
+        for frame in frames[-CALL_SITE_FRAMES:]
+    ]
+
+
+def explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    if not connection.features.supports_explaining_query_execution:
+        return None
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        # Точка сохранения не дает ошибке EXPLAIN испортить транзакцию.
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                rows = cursor.fetchall()
+    except Exception as error:
+        return f'EXPLAIN не выполнен: {error}'
+    return '\n'.join(' '.join(str(value) for value in row) for row in rows)
+
+
+class SlowQueryLogger:
+    '''execute_wrapper, записывающий запросы дольше порога.'''
+
+    def __init__(self, threshold_ms, with_explain=True):
+        self.threshold = threshold_ms / 1000
+        self.with_explain = with_explain
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_state, 'active', False):
+            return execute(sql, params, many, context)
+        started = time.monotonic()
+        result = execute(sql, params, many, context)
+        duration = time.monotonic() - started
+        if duration >= self.threshold:
+            # Запросы EXPLAIN и точек сохранения тоже проходят через
+            # обертку, их записывать не нужно.
+            _state.active = True
+            try:
+                self.log(context['connection'], sql, params, many, duration)
+            finally:
+                _state.active = False
+        return result
+
+    def log(self, connection, sql, params, many, duration):
+        entry = {
+            'duration_ms': round(duration * 1000, 3),
+            'view': view_label(),
+            'sql': sql,
+            'params': None if many else [str(value) for value in params or ()],
+            'call_site': call_site(),
+        }
+        if self.with_explain and not many:
+            entry['explain'] = explain(connection, sql, params)
+        logger.warning(json.dumps(entry, ensure_ascii=False))
+
+
+def configure_logger(options):
+    '''Подключает ротируемый файл, если у логгера нет обработчиков.'''
+    if logger.handlers:
+        return
+    os.makedirs(os.path.dirname(options['FILE']), exist_ok=True)
+    handler = RotatingFileHandler(
+        options['FILE'], maxBytes=options['MAX_BYTES'],
+        backupCount=options['BACKUP_COUNT'], encoding='utf-8',
+    )
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+
+
+def install(connection, **kwargs):
+    '''Добавляет обертку соединению; подходит как приемник сигнала.'''
+    options = settings.SLOW_QUERY_LOG
+    if any(isinstance(wrapper, SlowQueryLogger)
+           for wrapper in connection.execute_wrappers):
+        return
+    configure_logger(options)
+    connection.execute_wrappers.append(
+        SlowQueryLogger(options['THRESHOLD_MS'], options['EXPLAIN'])
+    )
+
+
+def uninstall(connection):
+    connection.execute_wrappers[:] = [
+        wrapper for wrapper in connection.execute_wrappers
+        if not isinstance(wrapper, SlowQueryLogger)
+    ]
+
+
+def setup():
+    '''Вызывается при запуске приложения.'''
+    if settings.SLOW_QUERY_LOG['ENABLED']:
+        connection_created.connect(install,
+                                   dispatch_uid='api.slow_queries.install')
@@ -0,0 +1,118 @@
+'''
+Ограничение частоты запросов по алгоритму token bucket.
+
+Для каждого ключа (пользователь или IP) в кэше Django хранится пара
+"количество жетонов, время последнего обновления". Ведро вмещает
+столько жетонов, сколько запросов разрешено за период, и пополняется
+равномерно, поэтому после паузы допускается всплеск, а в среднем -
+не больше заданной частоты. На ключ хранится одно значение вместо
+списка отметок времени, как у SimpleRateThrottle.
+
+Частоты берутся из REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] по `scope`.
+Счетчики разрешенных и отклоненных запросов по каждому scope доступны
+через get_stats.
+'''
+import time
+
+from django.core.cache import cache as default_cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+STATE_KEY = 'throttle:{}:{}'
+STATS_KEY = 'throttle:stats:{}:{}'
+EVENTS = ('allowed', 'throttled')
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    '''"10/min" -> (10, 60).'''
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def _count(scope, event):
+    key = STATS_KEY.format(scope, event)
+    if not default_cache.add(key, 1, timeout=None):
+        try:
+            default_cache.incr(key)
+        except ValueError:
+            default_cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    '''Счетчики запросов по всем настроенным scope.'''
+    return {
+        scope: {
+            event: default_cache.get(STATS_KEY.format(scope, event), 0)
+            for event in EVENTS
+        }
+        for scope in api_settings.DEFAULT_THROTTLE_RATES
+    }
+
+
+class TokenBucketThrottle(BaseThrottle):
+    '''
+    Базовый класс: `scope` выбирает частоту из настроек, `applies`
+    решает, ограничивается ли запрос.
+    '''
+    scope = None
+    cache = default_cache
+    timer = time.time
+
+    def applies(self, request):
+        return True
+
+    def get_cache_key(self, request):
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None or not self.applies(request):
+            return True
+        capacity, period = parse_rate(rate)
+        refill = capacity / period
+        key = STATE_KEY.format(self.scope, self.get_cache_key(request))
+        now = self.timer()
+        tokens, updated = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        self.wait_seconds = None
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill
+            _count(self.scope, 'throttled')
+            return False
+        # Гонка между одновременными запросами допускает лишний
+        # запрос-другой, зато обходится без блокировок.
+        self.cache.set(key, (tokens - 1, now), timeout=period)
+        _count(self.scope, 'allowed')
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SignupThrottle(TokenBucketThrottle):
+    scope = 'signup'
+
+
+class TokenThrottle(TokenBucketThrottle):
+    scope = 'token'
+
+
+class WriteThrottle(TokenBucketThrottle):
+    '''Изменяющие запросы, по пользователю или IP.'''
+    scope = 'writes'
+
+    def applies(self, request):
+        return request.method not in SAFE_METHODS
+
+
+class AnonReadThrottle(TokenBucketThrottle):
+    '''Чтение анонимными пользователями, по IP.'''
+    scope = 'anon_reads'
+
+    def applies(self, request):
+        return (request.method in SAFE_METHODS
+                and not request.user.is_authenticated)
@@ -2,13 +2,19 @@ from django.urls import include, path
 from rest_framework import routers
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, TokenView, UserRegView,
+from .views import (CategoryStatsViewSet, CategoryViewSet, CommentViewSet,
+                    ExportView, GenreStatsViewSet, GenreViewSet, MetricsView,
+                    ResponseCacheStatsView, ReviewViewSet, SearchView,
+                    ThrottleStatsView, TitleViewSet, TokenView, UserRegView,
                     UsersViewSet)
 
 router1 = routers.DefaultRouter()
 router1.register('users', UsersViewSet, basename='users')
 router1.register('titles', TitleViewSet, basename='title')
+# Статистика регистрируется раньше, иначе `stats` примут за slug.
+router1.register('categories/stats', CategoryStatsViewSet,
+                 basename='category-stats')
+router1.register('genres/stats', GenreStatsViewSet, basename='genre-stats')
 router1.register('categories', CategoryViewSet, basename='category')
 router1.register('genres', GenreViewSet, basename='genre')
 router1.register(
@@ -19,6 +25,11 @@ router1.register(r'titles/(?P<title_id>\d+)/reviews',
 
 urlpatterns = [
     path('v1/', include(router1.urls)),
+    path('v1/cache/stats/', ResponseCacheStatsView.as_view()),
+    path('v1/export/<str:table>/', ExportView.as_view()),
+    path('v1/metrics/', MetricsView.as_view()),
+    path('v1/search/', SearchView.as_view()),
+    path('v1/throttle/stats/', ThrottleStatsView.as_view()),
     path('v1/auth/', include([
         path('signup/', UserRegView.as_view()),
         path('token/', TokenView.as_view())
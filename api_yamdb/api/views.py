@@ -1,32 +1,49 @@
+from functools import partial
+
 from django.conf import settings
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import Throttled, ValidationError
 from rest_framework.pagination import (LimitOffsetPagination,
                                        PageNumberPagination)
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from reviews.filters import TitleFilterSet
-from reviews.models import Category, Genre, Review, Title
+from notifications.outbox import enqueue_email
+from reviews.csv_export import EXPORT_TABLES, FORMATS, export_rows
+from reviews.filters import TitleFilterSet, TitleOrderingFilter
+from reviews.models import (Category, CategoryStats, Genre, GenreStats,
+                            Review, Title, TitleRanking)
+from reviews.search import KINDS, search
+from user.confirmation import (issue_code, reset_failures, take_attempt,
+                               verify_code)
 from user.models import User
 
-from .email import send_confirmation_code
-from .mixins import CreateDeleteListViewSet
+from . import bulk, instrumentation
+from .authentication import access_token_for
+from .cache import CachedResponseMixin, get_stats
+from .email import send_confirmation_code, send_moderation_notice
+from .mixins import ConditionalGetMixin, CreateDeleteListViewSet
+from .pagination import PubDatePagination, TitlePagination
 from .permissions import AdminOrReadOnly, IsAdmin, IsAuthorOrModer, IsRoleAdmin
 from .serializers import (AdminUserSerializer, CategorySerializer,
-                          CommentSerializer, GenreSerializer, ReviewSerializer,
+                          CategoryStatsSerializer, CommentSerializer,
+                          GenreSerializer, GenreStatsSerializer,
+                          ReviewSerializer, SearchResultSerializer,
                           SignUpSerializer, TitleCreateSerialaizer,
                           TitleSerializer, TokenSerializer, UserSerializer)
+from .throttling import SignupThrottle, TokenThrottle
+from .throttling import get_stats as throttle_stats
 
 
-class CategoryViewSet(CreateDeleteListViewSet):
+class CategoryViewSet(CachedResponseMixin, CreateDeleteListViewSet):
+    cache_namespaces = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsAuthenticatedOrReadOnly, IsAdmin,)
@@ -44,18 +61,49 @@ class CategoryViewSet(CreateDeleteListViewSet):
     def perform_destroy(self, category):
         category.delete()
 
+    @action(detail=False, methods=['post', 'delete'],
+            permission_classes=(IsRoleAdmin,))
+    def bulk(self, request):
+        '''Создание массива категорий или удаление по массиву slug.'''
+        items = bulk.get_items(request.data)
+        if request.method == 'POST':
+            return bulk.create_groups('categories', items,
+                                      self.get_serializer_context())
+        return bulk.delete_groups('categories', items)
+
+
+class TitleStatsViewSet(viewsets.ReadOnlyModelViewSet):
+    '''
+    Сохраненная статистика произведений по группам, только чтение.
+    Группа в адресе указывается по slug.
+    '''
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    pagination_class = LimitOffsetPagination
+    filter_backends = (filters.OrderingFilter,)
+    ordering_fields = ('titles_count', 'reviews_count', 'rating')
+    ordering = ('-titles_count', 'pk')
+    lookup_url_kwarg = 'slug'
+
+
+class CategoryStatsViewSet(TitleStatsViewSet):
+    queryset = CategoryStats.objects.all()
+    serializer_class = CategoryStatsSerializer
+    lookup_field = 'category__slug'
+
 
 class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,
                           IsAuthorOrModer)
-    pagination_class = LimitOffsetPagination
+    pagination_class = PubDatePagination
 
     def get_queryset(self):
         review_id = self.kwargs.get('review_id')
         title_id = self.kwargs.get('title_id')
         review = get_object_or_404(Review, pk=review_id, title__pk=title_id)
-        return review.comments.all()
+        return review.comments.select_related('author').only(
+            'id', 'text', 'pub_date', 'review', 'author__username'
+        )
 
     def perform_create(self, serializer):
         review_id = self.kwargs.get('review_id')
@@ -63,7 +111,8 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, review=new_review)
 
 
-class GenreViewSet(CreateDeleteListViewSet):
+class GenreViewSet(CachedResponseMixin, CreateDeleteListViewSet):
+    cache_namespaces = ('genres',)
     queryset = Genre.objects.all().order_by('id')
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadOnly,)
@@ -76,58 +125,288 @@ class GenreViewSet(CreateDeleteListViewSet):
         genre.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['post', 'delete'],
+            permission_classes=(IsRoleAdmin,))
+    def bulk(self, request):
+        '''Создание массива жанров или удаление по массиву slug.'''
+        items = bulk.get_items(request.data)
+        if request.method == 'POST':
+            return bulk.create_groups('genres', items,
+                                      self.get_serializer_context())
+        return bulk.delete_groups('genres', items)
+
+
+class GenreStatsViewSet(TitleStatsViewSet):
+    queryset = GenreStats.objects.all()
+    serializer_class = GenreStatsSerializer
+    lookup_field = 'genre__slug'
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,
                           IsAuthorOrModer,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = PubDatePagination
 
     def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
+
+    def get_last_modified(self):
+        try:
+            return self.get_title().updated
+        except Http404:
+            return None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author').only(
+            'id', 'text', 'score', 'pub_date', 'title', 'author__username'
+        )
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, title=self.get_title())
 
-
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(
-        Avg('reviews__score')
-    ).order_by('name')
+    def is_moderation(self, review):
+        return review.author_id != self.request.user.id
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        review = serializer.save()
+        if self.is_moderation(review):
+            send_moderation_notice(review)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        if self.is_moderation(instance):
+            send_moderation_notice(instance, deleted=True)
+        instance.delete()
+
+
+class TitleViewSet(CachedResponseMixin, ConditionalGetMixin,
+                   viewsets.ModelViewSet):
+    cache_namespaces = ('titles',)
+    etag_namespaces = ('categories', 'genres')
+    # Жанры и категории берутся из справочников в памяти, см.
+    # reviews.lookups, поэтому их таблицы в запросе не участвуют.
+    queryset = Title.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly, IsAdmin,)
-    pagination_class = PageNumberPagination
+    pagination_class = TitlePagination
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilterSet
+    # Только хранимые поля, у каждого есть индекс (поле, id).
+    ordering_fields = ('name', 'year', 'rating', 'reviews_count')
+    ordering = ('name',)
+    # В rating бывает NULL, а курсор требует значений без NULL.
+    keyset_nullable = ('rating',)
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH', 'DELETE'):
             return TitleCreateSerialaizer
         return TitleSerializer
 
+    def filter_queryset(self, queryset):
+        '''Курсорная пагинация идет в порядке, выбранном `ordering`.'''
+        queryset = super().filter_queryset(queryset)
+        self.keyset_ordering = tuple(queryset.query.order_by)
+        nullable = [
+            field.lstrip('-') for field in self.keyset_ordering
+            if field.lstrip('-') in self.keyset_nullable
+        ]
+        if nullable and (self.paginator.cursor_query_param
+                         in self.request.query_params):
+            raise ValidationError({'ordering': (
+                f'Сортировка по {nullable[0]} недоступна вместе с '
+                f'{self.paginator.cursor_query_param}, используйте page.'
+            )})
+        return queryset
+
+    def get_cache_namespaces(self):
+        if self.action == 'retrieve':
+            return ('categories', 'genres', f'title:{self.kwargs["pk"]}')
+        if self.action in ('top', 'trending'):
+            return ('titles',)
+        return super().get_cache_namespaces()
+
+    def get_cache_key_parts(self):
+        if self.action in ('top', 'trending'):
+            # Все строки рейтинга пересчитываются вместе, и время расчета
+            # любой из них - версия таблицы, которую видят все процессы.
+            return (TitleRanking.objects.values_list(
+                'computed', flat=True
+            ).first(),)
+        return super().get_cache_key_parts()
+
+    def get_last_modified(self):
+        try:
+            return Title.objects.filter(pk=self.kwargs['pk']).values_list(
+                'updated', flat=True
+            ).first()
+        except ValueError:
+            return None
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            partial(self.cached_response, super().retrieve),
+            request, *args, **kwargs
+        )
+
+    def ranked_list(self, request, score):
+        '''
+        Страница произведений по предрассчитанному рейтингу: страница
+        строк TitleRanking по индексу и произведения по их id.
+        '''
+        self.keyset_ordering = (f'-{score}', 'title_id')
+        rankings = TitleRanking.objects.filter(
+            **{f'{score}__gt': 0}
+        ).order_by(*self.keyset_ordering)
+        page = self.paginate_queryset(rankings)
+        ids = [ranking.title_id for ranking in page]
+        titles = Title.objects.in_bulk(ids)
+        serializer = self.get_serializer(
+            [titles[pk] for pk in ids if pk in titles], many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'],
+            permission_classes=(IsRoleAdmin,))
+    def bulk(self, request):
+        '''
+        POST - создание массива произведений, PATCH - изменение (у
+        каждого элемента есть id), DELETE - удаление по массиву id.
+        '''
+        items = bulk.get_items(request.data)
+        if request.method == 'POST':
+            return bulk.create_titles(items, self.get_serializer_context())
+        if request.method == 'PATCH':
+            return bulk.update_titles(items, self.get_serializer_context())
+        return bulk.delete_titles(items)
+
+    @action(detail=False)
+    def top(self, request):
+        return self.cached_response(
+            lambda request: self.ranked_list(request, 'top_score'), request
+        )
+
+    @action(detail=False)
+    def trending(self, request):
+        return self.cached_response(
+            lambda request: self.ranked_list(request, 'trending_score'),
+            request
+        )
+
+
+class ResponseCacheStatsView(APIView):
+    '''Счетчики попаданий и промахов кэша ответов.'''
+    permission_classes = (IsRoleAdmin,)
+
+    def get(self, request):
+        return Response(get_stats(), status=status.HTTP_200_OK)
+
+
+class ThrottleStatsView(APIView):
+    '''Счетчики разрешенных и отклоненных запросов по видам ограничений.'''
+    permission_classes = (IsRoleAdmin,)
+
+    def get(self, request):
+        return Response(throttle_stats(), status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    '''
+    Перцентили числа и времени SQL-запросов, времени рендеринга и
+    полного времени обработки по действиям вьюсетов. DELETE сбрасывает
+    накопленные данные.
+    '''
+    permission_classes = (IsRoleAdmin,)
+
+    def get(self, request):
+        return Response({
+            'enabled': settings.INSTRUMENTATION['ENABLED'],
+            'views': instrumentation.get_stats(),
+        }, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        instrumentation.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SearchView(APIView):
+    '''
+    Полнотекстовый поиск по названиям и описаниям произведений и текстам
+    отзывов (`?q=`), с учетом префиксов слов и сортировкой по
+    релевантности. Параметр `type` ограничивает поиск произведениями
+    (`title`) или отзывами (`review`).
+    '''
+    permission_classes = (AllowAny,)
+    pagination_class = LimitOffsetPagination
+
+    def get(self, request):
+        kind = request.query_params.get('type')
+        if kind not in KINDS:
+            kind = None
+        results = search(request.query_params.get('q', ''), kind)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = SearchResultSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class ExportView(APIView):
+    '''
+    Потоковая выгрузка таблицы в CSV (по умолчанию) или JSON Lines
+    (`?output=jsonl`) для администратора.
+    '''
+    permission_classes = (IsRoleAdmin,)
+
+    def get(self, request, table):
+        output = request.query_params.get('output', 'csv')
+        if table not in EXPORT_TABLES or output not in FORMATS:
+            raise Http404
+        response = StreamingHttpResponse(
+            export_rows(table, output), content_type=FORMATS[output]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{table}.{output}"'
+        )
+        return response
+
 
 class ConfCodeView(APIView):
     '''
-    При получении POST-запроса с email и username отправляет
+    При получении POST-запроса с email и username ставит в очередь
     письмо с confirmation_code на email.
     '''
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (SignupThrottle,)
 
     def post(self, request):
-        serializer = SignUpSerializer(data=request.data)
+        serializer = SignUpSerializer.for_signup(request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
         email = serializer.validated_data.get('email')
-        confirmation_code = default_token_generator.make_token(user)
-        send_mail(
-            subject='Код подтверждения регистрации',
-            message='Вы зарегистрировались на YAMDB!'
-                    f'Ваш код подтвержения: {confirmation_code}',
-            from_email=settings.ADMIN_EMAIL,
-            recipient_list=[email],
-            fail_silently=False,
-        )
+        with transaction.atomic():
+            user = serializer.instance or serializer.save()
+            confirmation_code = issue_code(user)
+            enqueue_email(
+                subject='Код подтверждения регистрации',
+                message='Вы зарегистрировались на YAMDB!'
+                        f'Ваш код подтвержения: {confirmation_code}',
+                from_email=settings.ADMIN_EMAIL,
+                recipient_list=[email],
+            )
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
@@ -137,30 +416,39 @@ class TokenView(APIView):
     возвращает JWT-токен.
     '''
     permission_classes = (AllowAny,)
+    throttle_classes = (TokenThrottle,)
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(status=status.HTTP_400_BAD_REQUEST)
         username = serializer.data['username']
-        user = get_object_or_404(User, username=username)
-        confirmation_code = serializer.data['confirmation_code']
-        if not default_token_generator.check_token(user, confirmation_code):
+        if not take_attempt(username):
+            raise Throttled(
+                wait=settings.CONFIRMATION_CODE['ATTEMPTS_WINDOW'],
+                detail='Слишком много попыток ввода кода'
+            )
+        user = verify_code(username, serializer.data['confirmation_code'])
+        if user is None:
+            get_object_or_404(User, username=username)
             return Response({'Неверный код'},
                             status=status.HTTP_400_BAD_REQUEST)
-        token = RefreshToken.for_user(user)
-        return Response({'token': token.access_token},
+        reset_failures(username)
+        token = access_token_for(user)
+        return Response({'token': str(token)},
                         status=status.HTTP_200_OK)
 
 
 class UserRegView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (SignupThrottle,)
 
     def post(self, request):
-        serializer = SignUpSerializer(data=request.data)
+        serializer = SignUpSerializer.for_signup(request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            send_confirmation_code(user)
+            with transaction.atomic():
+                user = serializer.instance or serializer.save()
+                send_confirmation_code(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -177,10 +465,12 @@ class UsersViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get', 'patch'], url_path='me',
             url_name='me', permission_classes=(IsAuthenticated,))
     def about_me(self, request):
-        serializer = UserSerializer(request.user)
+        # request.user может быть собран из токена без остальных полей.
+        user = get_object_or_404(User, pk=request.user.pk)
+        serializer = UserSerializer(user)
         if request.method == 'PATCH':
             serializer = UserSerializer(
-                request.user, data=request.data, partial=True
+                user, data=request.data, partial=True
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -21,12 +21,14 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
-    'api',
-    'reviews',
+    'api.apps.ApiConfig',
+    'reviews.apps.ReviewConfig',
     'user',
+    'notifications',
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -110,13 +112,23 @@ EMPTY = '-'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.WriteThrottle',
+        'api.throttling.AnonReadThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('THROTTLE_SIGNUP', '20/min'),
+        'token': os.getenv('THROTTLE_TOKEN', '30/min'),
+        'writes': os.getenv('THROTTLE_WRITES', '120/min'),
+        'anon_reads': os.getenv('THROTTLE_ANON_READS', '600/min'),
+    },
 }
 
 
@@ -130,5 +142,88 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'tmp/email')
 EMAIL_HOST = 'localhost'
 EMAIL_PORT = 25
 ADMIN_EMAIL = 'admin@api_yamdb.com'
+DEFAULT_FROM_EMAIL = ADMIN_EMAIL
+
+# Очередь писем: команда send_emails отправляет их пачками.
+# RATE_LIMIT - писем в секунду, None - без ограничения.
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'RATE_LIMIT': None,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 60,
+    'MAX_RETRY_DELAY': 60 * 60,
+    'LEASE': 5 * 60,
+}
+
+# Замеры запросов по действиям вьюсетов, см. /api/v1/metrics/.
+INSTRUMENTATION = {
+    'ENABLED': os.getenv('INSTRUMENTATION_ENABLED', 'False') == 'True',
+}
+
+# Журнал SQL-запросов дольше THRESHOLD_MS с планами запросов.
+SLOW_QUERY_LOG = {
+    'ENABLED': os.getenv('SLOW_QUERY_LOG_ENABLED', 'False') == 'True',
+    'THRESHOLD_MS': int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200)),
+    'EXPLAIN': True,
+    'FILE': os.path.join(BASE_DIR, 'logs', 'slow_queries.log'),
+    'MAX_BYTES': 10 * 1024 * 1024,
+    'BACKUP_COUNT': 5,
+}
+
+# Коды подтверждения: TTL и окно попыток в секундах.
+CONFIRMATION_CODE = {
+    'LENGTH': 8,
+    'TTL': 60 * 60,
+    'MAX_ATTEMPTS': 5,
+    'ATTEMPTS_WINDOW': 15 * 60,
+}
+
+# Справочники жанров и категорий в памяти процесса (reviews/lookups.py).
+# TTL - сколько секунд снимок живет без перечитывания: с кэшем в памяти
+# процесса другие процессы узнают об изменениях только так.
+LOOKUPS = {
+    'TTL': int(os.getenv('LOOKUPS_TTL', 10)),
+}
+
+# Статистика жанров и категорий: длина списка лучших произведений.
+TITLE_STATS = {
+    'TOP_SIZE': 10,
+}
+
+# Массовая запись произведений, жанров и категорий (эндпоинты bulk/).
+BULK_WRITE = {
+    'MAX_ITEMS': int(os.getenv('BULK_WRITE_MAX_ITEMS', 1000)),
+}
+
+# Рейтинги /titles/top/ и /titles/trending/, пересчитываются командой
+# refresh_rankings. MIN_REVIEWS - вес средней оценки всех отзывов в
+# байесовской оценке, HALF_LIFE и WINDOW - в секундах.
+TITLE_RANKING = {
+    'MIN_REVIEWS': 5,
+    'HALF_LIFE': 24 * 60 * 60,
+    'WINDOW': 7 * 24 * 60 * 60,
+    'BATCH_SIZE': 2000,
+}
 
 LEN_OUTPUT = 100
+
+# Версии пространств имен кэша ответов (api/cache.py) хранятся в этом же
+# кэше. LocMemCache у каждого процесса свой: запись инвалидирует ответы
+# только в обработавшем ее процессе, остальные отдают старые списки до
+# истечения RESPONSE_CACHE['TIMEOUT']. При нескольких процессах нужен
+# общий кэш (FileBasedCache, Memcached, Redis) в CACHE_BACKEND; без него
+# пользователь JWT-токена загружается из базы (см. api/authentication.py).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+RESPONSE_CACHE = {
+    'ENABLED': os.getenv('RESPONSE_CACHE_ENABLED', 'True') == 'True',
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 60,
+}
@@ -0,0 +1,20 @@
+from api_yamdb.settings import EMPTY
+from django.contrib import admin
+
+from .models import EmailBatch, OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'subject', 'recipients', 'status',
+                    'attempts', 'next_attempt_at', 'sent_at')
+    search_fields = ('recipients',)
+    list_filter = ('status',)
+    empty_value_display = EMPTY
+
+
+@admin.register(EmailBatch)
+class EmailBatchAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'started', 'sent', 'failed', 'seconds',
+                    'messages_per_second')
+    empty_value_display = EMPTY
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Писем в одной пачке, по умолчанию '
+                 'EMAIL_OUTBOX["BATCH_SIZE"]',
+        )
+        parser.add_argument(
+            '--rate', type=float, default=None,
+            help='Не больше указанного числа писем в секунду, по умолчанию '
+                 'EMAIL_OUTBOX["RATE_LIMIT"]',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а проверять очередь постоянно',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза между проверками очереди в режиме --loop, секунды',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            batches = send_pending(options['batch_size'],
+                                   rate_limit=options['rate'])
+            for batch in batches:
+                self.stdout.write(
+                    f'Пачка {batch.pk}: отправлено {batch.sent}, '
+                    f'с ошибкой {batch.failed}, '
+                    f'{batch.messages_per_second:.1f} писем/с'
+                )
+            if batches or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Отправлено писем: {sum(b.sent for b in batches)}, '
+                    f'с ошибкой: {sum(b.failed for b in batches)}'
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
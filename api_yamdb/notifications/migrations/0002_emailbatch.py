@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailBatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField(verbose_name='Начало отправки')),
+                ('seconds', models.FloatField(verbose_name='Длительность, секунды')),
+                ('sent', models.PositiveIntegerField(verbose_name='Отправлено')),
+                ('failed', models.PositiveIntegerField(verbose_name='С ошибкой')),
+            ],
+            options={
+                'verbose_name': 'Пачка писем',
+                'verbose_name_plural': 'Пачки писем',
+                'ordering': ('-started',),
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    '''Модель письма в очереди на отправку'''
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField(max_length=255,
+                               verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(max_length=254,
+                                  verbose_name='Отправитель')
+    recipients = models.TextField(
+        verbose_name='Получатели',
+        help_text='Адреса получателей через запятую')
+    status = models.CharField(max_length=10,
+                              choices=STATUSES,
+                              default=PENDING,
+                              verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки отправки')
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка')
+    claim = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Метка обработчика',
+        help_text='Метка процесса, который отправляет письмо')
+    last_error = models.TextField(blank=True,
+                                  verbose_name='Последняя ошибка')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Дата постановки в очередь')
+    sent_at = models.DateTimeField(null=True,
+                                   blank=True,
+                                   verbose_name='Дата отправки')
+
+    class Meta:
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ('-created',)
+        indexes = (
+            models.Index(fields=('status', 'next_attempt_at'),
+                         name='outbox_status_next_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipients}'
+
+    @property
+    def recipient_list(self):
+        return [email for email in self.recipients.split(',') if email]
+
+
+class EmailBatch(models.Model):
+    '''Модель итогов отправки одной пачки писем'''
+    started = models.DateTimeField(verbose_name='Начало отправки')
+    seconds = models.FloatField(verbose_name='Длительность, секунды')
+    sent = models.PositiveIntegerField(verbose_name='Отправлено')
+    failed = models.PositiveIntegerField(verbose_name='С ошибкой')
+
+    class Meta:
+        verbose_name = 'Пачка писем'
+        verbose_name_plural = 'Пачки писем'
+        ordering = ('-started',)
+
+    def __str__(self):
+        return f'{self.started:%Y-%m-%d %H:%M:%S}: {self.sent}/{self.size}'
+
+    @property
+    def size(self):
+        return self.sent + self.failed
+
+    @property
+    def messages_per_second(self):
+        if not self.seconds:
+            return float(self.size)
+        return self.size / self.seconds
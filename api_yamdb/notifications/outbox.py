@@ -0,0 +1,145 @@
+'''
+Очередь исходящих писем.
+
+Запрос только сохраняет письмо в таблицу OutgoingEmail, а отправляет его
+команда send_emails. Обработчик забирает пачку писем, помечая их своей
+меткой и сдвигая next_attempt_at на время аренды: если процесс упадет,
+письма снова станут доступны после окончания аренды. Пачка отправляется
+через одно соединение с почтовым сервером, неудачные письма
+откладываются с экспоненциально растущей задержкой. Скорость отправки
+ограничивается EMAIL_OUTBOX['RATE_LIMIT'] писем в секунду, итоги каждой
+пачки сохраняются в EmailBatch.
+'''
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import EmailBatch, OutgoingEmail
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None):
+    '''Ставит письмо в очередь, аналог send_mail без отправки.'''
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=','.join(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    '''Задержка перед следующей попыткой после `attempts` неудачных.'''
+    options = settings.EMAIL_OUTBOX
+    seconds = options['RETRY_DELAY'] * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, options['MAX_RETRY_DELAY']))
+
+
+def claim_batch(batch_size):
+    '''Забирает в обработку пачку писем, готовых к отправке.'''
+    now = timezone.now()
+    ids = list(
+        OutgoingEmail.objects.filter(
+            status__in=(OutgoingEmail.PENDING, OutgoingEmail.SENDING),
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at').values_list('pk', flat=True)[
+            :batch_size
+        ]
+    )
+    if not ids:
+        return []
+    claim = uuid.uuid4().hex
+    lease = timedelta(seconds=settings.EMAIL_OUTBOX['LEASE'])
+    # Условие на next_attempt_at не дает двум обработчикам забрать
+    # одно письмо: второй UPDATE его уже не найдет.
+    OutgoingEmail.objects.filter(
+        pk__in=ids, next_attempt_at__lte=now,
+        status__in=(OutgoingEmail.PENDING, OutgoingEmail.SENDING),
+    ).update(status=OutgoingEmail.SENDING, claim=claim,
+             next_attempt_at=now + lease)
+    return list(
+        OutgoingEmail.objects.filter(pk__in=ids, claim=claim).order_by('pk')
+    )
+
+
+def deliver(emails, connection=None):
+    '''
+    Отправляет письма через одно соединение, сохраняет результат
+    и возвращает EmailBatch с итогами.
+    '''
+    started = timezone.now()
+    clock = time.monotonic()
+    max_attempts = settings.EMAIL_OUTBOX['MAX_ATTEMPTS']
+    connection = connection or get_connection()
+    sent, failures = [], []
+    try:
+        connection.open()
+    except Exception as error:
+        failures = [(email, error) for email in emails]
+    else:
+        # Письма отправляются по одному через общее соединение:
+        # send_messages возвращает только число отправленных писем, а при
+        # ошибке посередине пачки не видно, какие письма уже ушли. Одним
+        # вызовом нельзя отметить результат каждой строки, а повтор всей
+        # пачки отправил бы часть писем дважды. SMTP-бэкенд и сам шлет
+        # письма одно за другим, поэтому лишних соединений нет.
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email,
+                    email.recipient_list, connection=connection,
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as error:
+                    failures.append((email, error))
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT, sent_at=now, claim='', last_error='',
+    )
+    for email, error in failures:
+        email.attempts += 1
+        email.last_error = repr(error)
+        email.claim = ''
+        if email.attempts >= max_attempts:
+            email.status = OutgoingEmail.FAILED
+        else:
+            email.status = OutgoingEmail.PENDING
+            email.next_attempt_at = now + retry_delay(email.attempts)
+        email.save(update_fields=('attempts', 'last_error', 'claim',
+                                  'status', 'next_attempt_at'))
+    return EmailBatch.objects.create(
+        started=started, seconds=time.monotonic() - clock,
+        sent=len(sent), failed=len(failures),
+    )
+
+
+def send_pending(batch_size=None, connection=None, rate_limit=None):
+    '''
+    Отправляет все готовые письма пачками не быстрее `rate_limit`
+    писем в секунду и возвращает список EmailBatch.
+    '''
+    batch_size = batch_size or settings.EMAIL_OUTBOX['BATCH_SIZE']
+    rate_limit = rate_limit or settings.EMAIL_OUTBOX['RATE_LIMIT']
+    if rate_limit:
+        # Пачка больше секундного лимита ушла бы одним всплеском.
+        batch_size = max(1, min(batch_size, int(rate_limit)))
+    batches = []
+    while True:
+        emails = claim_batch(batch_size)
+        if not emails:
+            return batches
+        started = time.monotonic()
+        batches.append(deliver(emails, connection))
+        if rate_limit:
+            pause = len(emails) / rate_limit - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
@@ -1,7 +1,8 @@
 from api_yamdb.settings import EMPTY
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title
+from .models import (Category, CategoryStats, Comment, Genre, GenreStats,
+                     Review, Title)
 
 
 @admin.register(Category)
@@ -23,7 +24,7 @@ class GenreAdmin(admin.ModelAdmin):
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'year',
-                    'description', 'category')
+                    'description', 'category', 'rating', 'reviews_count')
     list_editable = ('category',)
     search_fields = ('name',)
     list_filter = ('year',)
@@ -46,3 +47,16 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('author',)
     empty_value_display = EMPTY
+
+
+@admin.register(CategoryStats, GenreStats)
+class TitleStatsAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'titles_count', 'reviews_count', 'rating',
+                    'updated')
+    empty_value_display = EMPTY
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class ReviewConfig(AppConfig):
-    name = 'review'
+    name = 'reviews'
+
+    def ready(self):
+        from . import signals  # noqa: F401
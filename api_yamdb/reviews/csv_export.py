@@ -0,0 +1,56 @@
+'''
+Потоковая выгрузка данных в CSV и JSON Lines.
+
+Колонки совпадают с файлами из static/data, поэтому выгрузку можно
+загрузить обратно командой import_csv. Записи читаются через
+iterator(chunk_size=...), и в памяти одновременно находится только
+одна пачка строк.
+'''
+import csv
+import json
+from datetime import datetime, timezone
+
+from .csv_import import TABLES, TABLES_BY_NAME
+
+EXPORT_TABLES = tuple(table.name for table in TABLES)
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class _Line:
+    '''Буфер для csv.writer, возвращающий записанную строку.'''
+
+    def write(self, value):
+        return value
+
+
+def _format(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc)
+        return value.isoformat(timespec='milliseconds').replace(
+            '+00:00', 'Z'
+        )
+    return value
+
+
+def export_rows(name, output='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    '''Генератор строк выгрузки таблицы в формате csv или jsonl.'''
+    table = TABLES_BY_NAME[name]
+    columns = list(table.columns)
+    values = (table.model.objects.order_by('pk')
+              .values_list(*table.columns.values())
+              .iterator(chunk_size=chunk_size))
+    if output == 'csv':
+        writer = csv.writer(_Line())
+        yield writer.writerow(columns)
+        for row in values:
+            yield writer.writerow([_format(value) for value in row])
+    else:
+        for row in values:
+            record = dict(zip(columns, map(_format, row)))
+            yield json.dumps(record, ensure_ascii=False) + '\n'
@@ -0,0 +1,272 @@
+'''
+Потоковая загрузка данных из CSV-файлов в модели проекта.
+
+Файл читается построчно и вставляется пачками фиксированного размера
+через bulk_create, поэтому расход памяти не зависит от размера файла.
+Ссылки на небольшие справочники (категории, жанры) проверяются по
+словарям в памяти, ссылки на остальные таблицы - одним запросом на пачку.
+Если пачка нарушает ограничения базы (например, запись уже загружена),
+она вставляется по одной записи, и конфликтующие попадают в отчет.
+'''
+import csv
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from user.models import User
+
+from .models import Category, Comment, Genre, Review, Title
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 10
+
+
+class CsvTable:
+    '''Описание соответствия CSV-файла модели.'''
+
+    def __init__(self, name, model, columns, foreign_keys=None,
+                 defaults=None):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.foreign_keys = foreign_keys or {}
+        self.defaults = defaults or {}
+
+    @property
+    def filename(self):
+        return f'{self.name}.csv'
+
+
+TABLES = (
+    CsvTable('users', User, {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+        'last_name': 'last_name',
+    }, defaults={'password': lambda: make_password(None)}),
+    CsvTable('category', Category, {'id': 'id', 'name': 'name',
+                                    'slug': 'slug'}),
+    CsvTable('genre', Genre, {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    CsvTable('titles', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'category': 'category_id', 'description': 'description',
+    }, foreign_keys={'category_id': Category}),
+    CsvTable('genre_title', Title.genre.through, {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id',
+    }, foreign_keys={'title_id': Title, 'genre_id': Genre}),
+    CsvTable('review', Review, {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date',
+    }, foreign_keys={'title_id': Title, 'author_id': User}),
+    CsvTable('comments', Comment, {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date',
+    }, foreign_keys={'review_id': Review, 'author_id': User}),
+)
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+# Справочники, которые целиком держатся в памяти.
+IN_MEMORY_MODELS = (Category, Genre)
+
+
+class ImportResult:
+    '''
+    processed - записи, отправленные в базу. С ignore_conflicts часть из
+    них могла уже быть в базе и не вставиться.
+    '''
+
+    def __init__(self, table):
+        self.table = table
+        self.processed = 0
+        self.skipped = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.seconds:
+            return float(self.processed)
+        return self.processed / self.seconds
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'строка {line}: {message}')
+
+
+class ForeignKeyResolver:
+    '''Проверяет ссылки по id и переводит slug справочников в id.'''
+
+    def __init__(self):
+        self.ids = {}
+        self.slugs = {}
+
+    def _load(self, model):
+        if model not in self.ids:
+            self.ids[model] = set()
+            self.slugs[model] = {}
+            for pk, slug in model.objects.values_list('pk', 'slug'):
+                self.ids[model].add(pk)
+                self.slugs[model][slug] = pk
+
+    def to_id(self, model, value):
+        if value.isdigit():
+            return int(value)
+        if model in IN_MEMORY_MODELS:
+            self._load(model)
+            return self.slugs[model].get(value)
+        return None
+
+    def existing(self, model, ids):
+        if model in IN_MEMORY_MODELS:
+            self._load(model)
+            return ids & self.ids[model]
+        return set(
+            model.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+
+    def remember(self, model, objects):
+        if model in self.ids:
+            for obj in objects:
+                self.ids[model].add(obj.pk)
+                self.slugs[model][obj.slug] = obj.pk
+
+
+@contextmanager
+def keep_dates(model):
+    '''Не дает auto_now_add перезаписать даты из файла.'''
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def read_rows(file):
+    '''Построчно читает CSV, возвращая номер строки и запись.'''
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def build_object(table, row, resolver):
+    values = {}
+    for column, attname in table.columns.items():
+        value = row.get(column, '')
+        if attname in table.foreign_keys:
+            value = resolver.to_id(table.foreign_keys[attname], value)
+            if value is None:
+                raise ValidationError(f'неизвестная ссылка в поле {column}')
+        elif attname == 'pub_date':
+            value = parse_datetime(value)
+            if value is None:
+                raise ValidationError(f'неверная дата в поле {column}')
+        values[attname] = value
+    for attname, default in table.defaults.items():
+        values[attname] = default()
+    obj = table.model(**values)
+    exclude = [
+        field.name for field in table.model._meta.concrete_fields
+        if field.attname in table.foreign_keys
+    ]
+    obj.clean_fields(exclude=exclude)
+    return obj
+
+
+def check_foreign_keys(table, batch, resolver, result):
+    for attname, model in table.foreign_keys.items():
+        existing = resolver.existing(
+            model, {getattr(obj, attname) for _, obj in batch}
+        )
+        valid = []
+        for line, obj in batch:
+            if getattr(obj, attname) in existing:
+                valid.append((line, obj))
+            else:
+                result.add_error(
+                    line, f'{model.__name__} {getattr(obj, attname)} '
+                          f'не найден'
+                )
+        batch = valid
+    return batch
+
+
+def insert_each(model, batch, result):
+    '''Вставляет записи по одной, пропуская нарушающие ограничения базы.'''
+    inserted = []
+    for line, obj in batch:
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([obj])
+        except IntegrityError as error:
+            result.add_error(line, f'конфликт с записью в базе: {error}')
+        else:
+            inserted.append(obj)
+    return inserted
+
+
+def build_batch(table, chunk, resolver, result):
+    '''Строит объекты из строк, записи с ошибками попадают в отчет.'''
+    batch = []
+    for line, row in chunk:
+        try:
+            batch.append((line, build_object(table, row, resolver)))
+        except ValidationError as error:
+            result.add_error(line, '; '.join(error.messages))
+    return batch
+
+
+def insert_batch(table, batch, resolver, result, ignore_conflicts=False):
+    '''Проверяет ссылки пачки и вставляет ее в базу.'''
+    batch = check_foreign_keys(table, batch, resolver, result)
+    objects = [obj for _, obj in batch]
+    try:
+        with transaction.atomic():
+            table.model.objects.bulk_create(
+                objects, ignore_conflicts=ignore_conflicts
+            )
+    except IntegrityError:
+        objects = insert_each(table.model, batch, result)
+    resolver.remember(table.model, objects)
+    result.processed += len(objects)
+
+
+def import_rows(table, rows, batch_size=DEFAULT_BATCH_SIZE,
+                ignore_conflicts=False, resolver=None):
+    '''Загружает записи таблицы пачками и возвращает ImportResult.'''
+    resolver = resolver or ForeignKeyResolver()
+    result = ImportResult(table)
+    started = time.monotonic()
+    with keep_dates(table.model):
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            batch = build_batch(table, chunk, resolver, result)
+            insert_batch(table, batch, resolver, result, ignore_conflicts)
+    result.seconds = time.monotonic() - started
+    return result
+
+
+def import_table(table, directory, **options):
+    path = os.path.join(directory, table.filename)
+    with open(path, encoding='utf-8', newline='') as file:
+        return import_rows(table, read_rows(file), **options)
+
+
+def reset_sequences(models):
+    '''Сдвигает автоинкремент после вставки записей с явными id.'''
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
@@ -1,15 +1,46 @@
 from django_filters import CharFilter, FilterSet, NumberFilter
+from rest_framework.filters import OrderingFilter
 
+from reviews.lookups import CATEGORIES, GENRES
 from reviews.models import Title
 
 
 class TitleFilterSet(FilterSet):
-    '''Фильтр для произведений'''
-    category = CharFilter(field_name='category__slug')
-    genre = CharFilter(field_name='genre__slug')
+    '''
+    Фильтр для произведений. slug жанра и категории переводится в id
+    по справочникам в памяти, поэтому таблицы жанров и категорий в
+    запросе не участвуют.
+    '''
+    category = CharFilter(method='filter_lookup', field_name='category')
+    genre = CharFilter(method='filter_lookup', field_name='genre')
     name = CharFilter(field_name='name', lookup_expr='contains')
     year = NumberFilter(field_name='year')
 
+    tables = {'category': CATEGORIES, 'genre': GENRES}
+
     class Meta:
         model = Title
         fields = ('category', 'genre', 'year', 'name')
+
+    def filter_lookup(self, queryset, name, value):
+        pk = self.tables[name].get().by_slug.get(value)
+        if pk is None:
+            return queryset.none()
+        return queryset.filter(**{name: pk})
+
+
+class TitleOrderingFilter(OrderingFilter):
+    '''
+    Сортировка по полям `ordering_fields` вьюсета. К порядку добавляется
+    id в направлении последнего поля: порядок становится однозначным и
+    совпадает с индексом (поле, id), который читается в любую сторону.
+    '''
+
+    def get_ordering(self, request, queryset, view):
+        ordering = [
+            field for field in super().get_ordering(request, queryset, view)
+            if field.lstrip('-') != 'id'
+        ]
+        if not ordering:
+            return ['id']
+        return ordering + ['-id' if ordering[-1].startswith('-') else 'id']
@@ -0,0 +1,112 @@
+'''
+Справочники жанров и категорий в памяти процесса.
+
+Таблицы маленькие и меняются редко, поэтому каждый процесс держит их
+целиком: slug -> id для записи и фильтров и id -> готовый словарь для
+ответов. Актуальность проверяется по версии в кэше Django: сигналы
+меняют версию при любом изменении жанра или категории, и процесс
+перечитывает таблицу при первом обращении с новой версией. Версию видят
+все процессы только при общем кэше; с LocMemCache ее меняет лишь процесс,
+изменивший справочник, поэтому снимок к тому же перечитывается не реже
+раза в LOOKUPS['TTL'] секунд.
+'''
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Category, Genre, Title
+
+VERSION_KEY = 'lookups:version:{}'
+
+
+class LookupSnapshot:
+    '''Содержимое справочника для одной версии.'''
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.loaded = time.monotonic()
+        self.by_id = {}
+        self.by_slug = {}
+        self.position = {}
+        for position, row in enumerate(rows):
+            pk = row.pop('id')
+            self.by_id[pk] = row
+            self.by_slug[row['slug']] = pk
+            self.position[pk] = position
+
+    def is_fresh(self, version):
+        age = time.monotonic() - self.loaded
+        return self.version == version and age < settings.LOOKUPS['TTL']
+
+    def sorted_ids(self, ids):
+        '''id в порядке сортировки модели по умолчанию.'''
+        return sorted(
+            (pk for pk in ids if pk in self.by_id), key=self.position.get
+        )
+
+
+class LookupTable:
+
+    def __init__(self, model, fields=('name', 'slug')):
+        self.model = model
+        self.fields = fields
+        self.version_key = VERSION_KEY.format(model._meta.label_lower)
+        self.snapshot = None
+        self.lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # Поля DRF копируются вместе с аргументами, а справочник один
+        # на процесс.
+        return self
+
+    def get_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def invalidate(self):
+        '''Заставляет все процессы перечитать справочник.'''
+        cache.set(self.version_key, uuid.uuid4().hex, timeout=None)
+
+    def get(self):
+        version = self.get_version()
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.is_fresh(version):
+            return snapshot
+        with self.lock:
+            if self.snapshot is None or not self.snapshot.is_fresh(version):
+                rows = self.model.objects.values('id', *self.fields)
+                self.snapshot = LookupSnapshot(version, list(rows))
+            return self.snapshot
+
+
+GENRES = LookupTable(Genre)
+CATEGORIES = LookupTable(Category)
+TABLES = {Genre: GENRES, Category: CATEGORIES}
+
+
+def invalidate(*models):
+    for model in models or TABLES:
+        TABLES[model].invalidate()
+
+
+def prefetch_genre_ids(titles):
+    '''
+    Заполняет genre_ids у произведений одним запросом к связующей
+    таблице, без чтения таблицы жанров.
+    '''
+    titles = [title for title in titles if 'genre_ids' not in vars(title)]
+    if not titles:
+        return
+    genre_ids = {title.pk: [] for title in titles}
+    for title_id, genre_id in Title.genre.through.objects.filter(
+        title_id__in=genre_ids
+    ).values_list('title_id', 'genre_id'):
+        genre_ids[title_id].append(genre_id)
+    for title in titles:
+        title.genre_ids = genre_ids[title.pk]
@@ -0,0 +1,35 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from reviews.csv_export import EXPORT_TABLES, FORMATS, export_rows
+
+
+class Command(BaseCommand):
+    help = 'Выгружает данные в CSV или JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Каталог для файлов выгрузки')
+        parser.add_argument(
+            '--format', dest='output', choices=list(FORMATS), default='csv',
+            help='Формат файлов выгрузки',
+        )
+        parser.add_argument(
+            '--tables', nargs='+', choices=EXPORT_TABLES,
+            help='Выгрузить только указанные таблицы',
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for name in options['tables'] or EXPORT_TABLES:
+            path = os.path.join(options['output_dir'],
+                                f'{name}.{options["output"]}')
+            rows = 0
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                for line in export_rows(name, options['output']):
+                    file.write(line)
+                    rows += 1
+            if options['output'] == 'csv':
+                rows -= 1
+            self.stdout.write(f'{name}: выгружено {rows} в {path}')
+        self.stdout.write(self.style.SUCCESS('Выгрузка завершена'))
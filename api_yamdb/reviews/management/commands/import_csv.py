@@ -0,0 +1,139 @@
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import bump_versions
+from reviews import lookups
+from reviews.csv_import import (DEFAULT_BATCH_SIZE, TABLES, TABLES_BY_NAME,
+                                ForeignKeyResolver, import_table,
+                                reset_sequences)
+from reviews.parallel_import import (DEFAULT_CHUNK_SIZE, PARALLEL_TABLES,
+                                     clear_checkpoints, import_table_parallel)
+from reviews.rating import recalculate_ratings
+from reviews.stats import refresh_stats
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов в базу пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с CSV-файлами',
+        )
+        parser.add_argument(
+            '--tables', nargs='+', choices=list(TABLES_BY_NAME),
+            help='Загрузить только указанные таблицы',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество записей в одной вставке',
+        )
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать записи, которые уже есть в базе',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Количество процессов для чтения отзывов и комментариев',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Размер части файла в байтах для параллельной загрузки',
+        )
+        parser.add_argument(
+            '--checkpoint-dir',
+            help='Каталог контрольных точек; включает загрузку по частям '
+                 'с возобновлением после прерывания. Записи, которые уже '
+                 'есть в базе, при этом пропускаются',
+        )
+
+    def handle(self, *args, **options):
+        names = options['tables'] or list(TABLES_BY_NAME)
+        tables = [table for table in TABLES if table.name in names]
+        for table in tables:
+            path = os.path.join(options['path'], table.filename)
+            if not os.path.exists(path):
+                raise CommandError(f'Файл {path} не найден')
+
+        checkpoint_dir = options['checkpoint_dir']
+        if options['workers'] > 1 and not checkpoint_dir:
+            # Без каталога контрольные точки нужны только на время загрузки.
+            with tempfile.TemporaryDirectory() as checkpoint_dir:
+                self.import_tables(tables, checkpoint_dir, False, options)
+        else:
+            # При возобновлении таблицы без частей загружаются заново,
+            # и записи, вставленные прерванным запуском, пропускаются.
+            self.import_tables(tables, checkpoint_dir,
+                               bool(checkpoint_dir), options)
+
+        # Пересчет выполняется один раз, после загрузки всех частей.
+        reset_sequences([table.model for table in tables])
+        recalculate_ratings()
+        refresh_stats()
+        # bulk_create не отправляет сигналы, справочники и кэш ответов
+        # сбрасываются явно.
+        lookups.invalidate()
+        bump_versions('titles', 'genres', 'categories')
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена'))
+
+    def import_tables(self, tables, checkpoint_dir, resume, options):
+        resolver = ForeignKeyResolver()
+        for table in tables:
+            # Вставленные записи считаются по таблице: bulk_create с
+            # ignore_conflicts не сообщает, сколько записей пропущено.
+            before = table.model.objects.count()
+            if checkpoint_dir and table.name in PARALLEL_TABLES:
+                name, processed, skipped, seconds, errors = (
+                    self.import_chunks(table, checkpoint_dir, options)
+                )
+            else:
+                result = import_table(
+                    table, options['path'],
+                    batch_size=options['batch_size'],
+                    ignore_conflicts=options['ignore_conflicts'] or resume,
+                    resolver=resolver,
+                )
+                name, processed, skipped, seconds, errors = (
+                    table.name, result.processed, result.skipped,
+                    result.seconds, result.errors,
+                )
+            loaded = table.model.objects.count() - before
+            self.report(name, processed, loaded, skipped, seconds, errors)
+
+    def import_chunks(self, table, checkpoint_dir, options):
+        started = time.monotonic()
+        chunks = import_table_parallel(
+            table, options['path'], checkpoint_dir,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+        )
+        resumed = sum(chunk['resumed'] for chunk in chunks)
+        if resumed:
+            self.stdout.write(
+                f'{table.name}: пропущено уже загруженных частей: {resumed}'
+            )
+        clear_checkpoints(checkpoint_dir, table.name)
+        fresh = [chunk for chunk in chunks if not chunk['resumed']]
+        return (
+            f'{table.name} ({len(chunks)} частей)',
+            sum(chunk['processed'] for chunk in fresh),
+            sum(chunk['skipped'] for chunk in fresh),
+            time.monotonic() - started,
+            [f'байты {chunk["start"]}-{chunk["end"]}, {error}'
+             for chunk in fresh for error in chunk['errors']],
+        )
+
+    def report(self, name, processed, loaded, skipped, seconds, errors):
+        speed = processed / seconds if seconds else processed
+        self.stdout.write(
+            f'{name}: обработано {processed}, загружено {loaded}, '
+            f'пропущено {skipped} за {seconds:.2f} с ({speed:.0f} строк/с)'
+        )
+        for error in errors:
+            self.stderr.write(f'  {error}')
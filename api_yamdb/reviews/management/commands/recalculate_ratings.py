@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.rating import find_rating_mismatches, recalculate_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и проверяет сохраненный рейтинг произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить рейтинг, ничего не изменяя',
+        )
+
+    def handle(self, *args, **options):
+        mismatches = list(
+            find_rating_mismatches().values_list('pk', flat=True)
+        )
+        if options['check']:
+            if mismatches:
+                raise CommandError(
+                    f'Рейтинг расходится с отзывами у произведений: '
+                    f'{", ".join(map(str, mismatches))}'
+                )
+            self.stdout.write(self.style.SUCCESS('Рейтинг актуален'))
+            return
+        updated = recalculate_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано произведений: {updated}, '
+            f'исправлено расхождений: {len(mismatches)}'
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.ranking import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги лучших и популярных произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а пересчитывать рейтинги постоянно',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=15 * 60,
+            help='Пауза между пересчетами в режиме --loop, секунды',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            created = refresh_rankings()
+            self.stdout.write(self.style.SUCCESS(
+                f'Рейтинги пересчитаны: {created} произведений '
+                f'за {time.monotonic() - started:.2f} с'
+            ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
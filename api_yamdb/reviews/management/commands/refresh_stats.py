@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reviews.stats import refresh_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику жанров и категорий заново'
+
+    def handle(self, *args, **options):
+        refresh_stats()
+        self.stdout.write(self.style.SUCCESS('Статистика пересчитана'))
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    ratings = (Review.objects.order_by().values('title')
+               .annotate(total=Sum('score'), count=Count('id'),
+                         avg=Avg('score')))
+    for row in ratings.iterator():
+        Title.objects.filter(pk=row['title']).update(
+            rating_sum=row['total'],
+            reviews_count=row['count'],
+            rating=row['avg'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20220620_1209'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(editable=False, help_text='Средняя оценка произведения', null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Сумма оценок всех отзывов на произведение', verbose_name='Сумма оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
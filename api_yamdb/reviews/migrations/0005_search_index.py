@@ -0,0 +1,85 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE reviews_search USING fts5("
+    "name, body, kind UNINDEXED, object_id UNINDEXED, title_id UNINDEXED, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    "INSERT INTO reviews_search(rowid, name, body, kind, object_id, title_id) "
+    "SELECT id * 2, name, coalesce(description, ''), 'title', id, id "
+    "FROM reviews_title",
+
+    "INSERT INTO reviews_search(rowid, name, body, kind, object_id, title_id) "
+    "SELECT id * 2 + 1, '', text, 'review', id, title_id "
+    "FROM reviews_review",
+
+    "CREATE TRIGGER reviews_search_title_insert AFTER INSERT ON reviews_title "
+    "BEGIN "
+    "INSERT INTO reviews_search(rowid, name, body, kind, object_id, title_id) "
+    "VALUES (new.id * 2, new.name, coalesce(new.description, ''), 'title', "
+    "new.id, new.id); "
+    "END",
+
+    "CREATE TRIGGER reviews_search_title_update "
+    "AFTER UPDATE OF name, description ON reviews_title "
+    "BEGIN "
+    "UPDATE reviews_search SET name = new.name, "
+    "body = coalesce(new.description, '') WHERE rowid = new.id * 2; "
+    "END",
+
+    "CREATE TRIGGER reviews_search_title_delete AFTER DELETE ON reviews_title "
+    "BEGIN "
+    "DELETE FROM reviews_search WHERE rowid = old.id * 2; "
+    "END",
+
+    "CREATE TRIGGER reviews_search_review_insert "
+    "AFTER INSERT ON reviews_review "
+    "BEGIN "
+    "INSERT INTO reviews_search(rowid, name, body, kind, object_id, title_id) "
+    "VALUES (new.id * 2 + 1, '', new.text, 'review', new.id, new.title_id); "
+    "END",
+
+    "CREATE TRIGGER reviews_search_review_update "
+    "AFTER UPDATE OF text, title_id ON reviews_review "
+    "BEGIN "
+    "UPDATE reviews_search SET body = new.text, title_id = new.title_id "
+    "WHERE rowid = new.id * 2 + 1; "
+    "END",
+
+    "CREATE TRIGGER reviews_search_review_delete "
+    "AFTER DELETE ON reviews_review "
+    "BEGIN "
+    "DELETE FROM reviews_search WHERE rowid = old.id * 2 + 1; "
+    "END",
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS reviews_search_title_insert',
+    'DROP TRIGGER IF EXISTS reviews_search_title_update',
+    'DROP TRIGGER IF EXISTS reviews_search_title_delete',
+    'DROP TRIGGER IF EXISTS reviews_search_review_insert',
+    'DROP TRIGGER IF EXISTS reviews_search_review_update',
+    'DROP TRIGGER IF EXISTS reviews_search_review_delete',
+    'DROP TABLE IF EXISTS reviews_search',
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL),
+                             run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,87 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+GROUPS = (
+    ('GenreStats', 'Genre', 'genre'),
+    ('CategoryStats', 'Category', 'category'),
+)
+
+
+def fill_stats(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    top_size = settings.TITLE_STATS['TOP_SIZE']
+    for stats_name, group_name, field in GROUPS:
+        Stats = apps.get_model('reviews', stats_name)
+        Group = apps.get_model('reviews', group_name)
+        totals = {
+            row[field]: row for row in Title.objects.order_by()
+            .values(field).annotate(titles=Count('pk'),
+                                    total=Sum('rating_sum'),
+                                    count=Sum('reviews_count'))
+        }
+        for group_id in Group.objects.values_list('pk', flat=True):
+            row = totals.get(group_id, {})
+            count = row.get('count') or 0
+            total = row.get('total') or 0
+            top = list(
+                Title.objects.filter(**{field: group_id},
+                                     rating__isnull=False)
+                .order_by('-rating', 'pk')
+                .values_list('pk', 'rating')[:top_size]
+            )
+            Stats.objects.create(
+                pk=group_id,
+                titles_count=row.get('titles', 0),
+                reviews_count=count,
+                rating_sum=total,
+                rating=total / count if count else None,
+                top_titles=','.join(str(pk) for pk, _ in top),
+                top_threshold=top[-1][1] if top else None,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('titles_count', models.PositiveIntegerField(default=0, verbose_name='Количество произведений')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('rating', models.FloatField(help_text='Средняя оценка отзывов', null=True, verbose_name='Рейтинг')),
+                ('top_titles', models.TextField(blank=True, help_text='id произведений с наибольшим рейтингом через запятую', verbose_name='Лучшие произведения')),
+                ('top_threshold', models.FloatField(help_text='Рейтинг последнего произведения в списке лучших', null=True, verbose_name='Порог попадания в лучшие')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.Category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'Статистика категории',
+                'verbose_name_plural': 'Статистика категорий',
+            },
+        ),
+        migrations.CreateModel(
+            name='GenreStats',
+            fields=[
+                ('titles_count', models.PositiveIntegerField(default=0, verbose_name='Количество произведений')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('rating', models.FloatField(help_text='Средняя оценка отзывов', null=True, verbose_name='Рейтинг')),
+                ('top_titles', models.TextField(blank=True, help_text='id произведений с наибольшим рейтингом через запятую', verbose_name='Лучшие произведения')),
+                ('top_threshold', models.FloatField(help_text='Рейтинг последнего произведения в списке лучших', null=True, verbose_name='Порог попадания в лучшие')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('genre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.Genre', verbose_name='Жанр')),
+            ],
+            options={
+                'verbose_name': 'Статистика жанра',
+                'verbose_name_plural': 'Статистика жанров',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module('reviews.migrations.0005_search_index')
+
+# На SQLite добавление ограничения пересоздает таблицу reviews_title
+# вместе с ее триггерами поискового индекса, их нужно создать заново.
+TITLE_TRIGGERS = tuple(
+    sql for sql in search_index.CREATE_SQL
+    if sql.startswith('CREATE TRIGGER') and 'ON reviews_title' in sql
+)
+RESTORE_SQL = tuple(
+    f'DROP TRIGGER IF EXISTS {sql.split()[2]}' for sql in TITLE_TRIGGERS
+) + TITLE_TRIGGERS
+
+restore_triggers = search_index.run_on_sqlite(RESTORE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddConstraint(
+            model_name='title',
+            constraint=models.UniqueConstraint(
+                fields=('name', 'year', 'category'),
+                name='unique_name_year_category'
+            ),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 from user.models import User
 
@@ -71,15 +72,64 @@ class Title(models.Model):
                                  on_delete=models.SET_NULL,
                                  blank=True,
                                  null=True)
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок',
+        help_text='Сумма оценок всех отзывов на произведение')
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов')
+    rating = models.FloatField(null=True,
+                               editable=False,
+                               verbose_name='Рейтинг',
+                               help_text='Средняя оценка произведения')
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Меняется при изменении произведения и его отзывов')
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('-year',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'year', 'category'),
+                name='unique_name_year_category'
+            )
+        ]
+        indexes = (
+            models.Index(fields=('category', 'year', 'name'),
+                         name='title_category_year_name_idx'),
+            # Сортировки TitleOrderingFilter.
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(fields=('year', 'id'), name='title_year_id_idx'),
+            models.Index(fields=('rating', 'id'),
+                         name='title_rating_id_idx'),
+            models.Index(fields=('reviews_count', 'id'),
+                         name='title_reviews_count_id_idx'),
+        )
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        '''Запоминает загруженную категорию для пересчета статистики.'''
+        instance = super().from_db(db, field_names, values)
+        if 'category_id' in instance.__dict__:
+            instance._loaded_category_id = instance.category_id
+        return instance
+
+    @cached_property
+    def genre_ids(self):
+        '''id жанров из связующей таблицы, без чтения таблицы жанров.'''
+        return list(Title.genre.through.objects.filter(
+            title_id=self.pk
+        ).values_list('genre_id', flat=True))
+
 
 class Review(models.Model):
     '''Модель Отзыв'''
@@ -103,6 +153,16 @@ class Review(models.Model):
                                     help_text='Укажите дату',
                                     auto_now_add=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        '''Запоминает загруженную оценку для пересчета рейтинга.'''
+        instance = super().from_db(db, field_names, values)
+        loaded = instance.__dict__
+        if 'title_id' in loaded and 'score' in loaded:
+            instance._loaded_title_id = loaded['title_id']
+            instance._loaded_score = loaded['score']
+        return instance
+
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -112,6 +172,12 @@ class Review(models.Model):
                 name='unique_author_title'
             )
         ]
+        indexes = (
+            models.Index(fields=('title', 'pub_date'),
+                         name='review_title_pub_date_idx'),
+            models.Index(fields=('pub_date',),
+                         name='review_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.text[:settings.LEN_OUTPUT]
@@ -136,6 +202,101 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(fields=('review', 'pub_date'),
+                         name='comment_review_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.text[:settings.LEN_OUTPUT]
+
+
+class TitleStats(models.Model):
+    '''
+    Статистика произведений группы (жанра или категории), которая
+    хранится в таблице и меняется вместе с произведениями и отзывами.
+    rating - средняя оценка по всем отзывам на произведения группы.
+    '''
+    titles_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество произведений')
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов')
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок')
+    rating = models.FloatField(null=True,
+                               verbose_name='Рейтинг',
+                               help_text='Средняя оценка отзывов')
+    top_titles = models.TextField(
+        blank=True,
+        verbose_name='Лучшие произведения',
+        help_text='id произведений с наибольшим рейтингом через запятую')
+    top_threshold = models.FloatField(
+        null=True,
+        verbose_name='Порог попадания в лучшие',
+        help_text='Рейтинг последнего произведения в списке лучших')
+    updated = models.DateTimeField(auto_now=True,
+                                   verbose_name='Дата изменения')
+
+    class Meta:
+        abstract = True
+
+    @property
+    def top_title_ids(self):
+        return [int(pk) for pk in self.top_titles.split(',') if pk]
+
+
+class GenreStats(TitleStats):
+    '''Модель статистика жанра'''
+    genre = models.OneToOneField(Genre,
+                                 on_delete=models.CASCADE,
+                                 primary_key=True,
+                                 related_name='stats',
+                                 verbose_name='Жанр')
+    title_field = 'genre'
+
+    class Meta:
+        verbose_name = 'Статистика жанра'
+        verbose_name_plural = 'Статистика жанров'
+
+
+class CategoryStats(TitleStats):
+    '''Модель статистика категории'''
+    category = models.OneToOneField(Category,
+                                    on_delete=models.CASCADE,
+                                    primary_key=True,
+                                    related_name='stats',
+                                    verbose_name='Категория')
+    title_field = 'category'
+
+    class Meta:
+        verbose_name = 'Статистика категории'
+        verbose_name_plural = 'Статистика категорий'
+
+
+class TitleRanking(models.Model):
+    '''Модель предрассчитанный рейтинг произведения'''
+    title = models.OneToOneField(Title,
+                                 on_delete=models.CASCADE,
+                                 primary_key=True,
+                                 related_name='ranking',
+                                 verbose_name='Произведение')
+    top_score = models.FloatField(
+        verbose_name='Взвешенная оценка',
+        help_text='Средняя оценка с поправкой на число отзывов')
+    trending_score = models.FloatField(
+        verbose_name='Популярность',
+        help_text='Число недавних отзывов с затуханием по времени')
+    computed = models.DateTimeField(verbose_name='Дата расчета')
+
+    class Meta:
+        verbose_name = 'Рейтинг произведения'
+        verbose_name_plural = 'Рейтинги произведений'
+        indexes = (
+            models.Index(fields=('-top_score', 'title'),
+                         name='ranking_top_idx'),
+            models.Index(fields=('-trending_score', 'title'),
+                         name='ranking_trending_idx'),
+        )
@@ -0,0 +1,214 @@
+'''
+Параллельная загрузка больших CSV-файлов с возобновлением.
+
+Файл делится на диапазоны байтов по границам записей (с учетом
+переводов строк внутри кавычек). Дочерние процессы только читают и
+проверяют диапазоны, а вставляет записи один родительский процесс: так
+база (в том числе SQLite) всегда видит одного пишущего. После вставки
+диапазона в каталоге контрольных точек появляется файл, и при повторном
+запуске этот диапазон пропускается. Записи вставляются с
+ignore_conflicts, поэтому повторная загрузка диапазона, прерванного на
+середине, не создает дублей.
+'''
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.db import connections
+
+from .csv_import import (DEFAULT_BATCH_SIZE, TABLES_BY_NAME,
+                         ForeignKeyResolver, ImportResult, build_batch,
+                         insert_batch, keep_dates)
+
+PARALLEL_TABLES = ('review', 'comments')
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+SPLIT_BLOCK_SIZE = 1024 * 1024
+
+
+def split_csv(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''Возвращает диапазоны байтов [start, end) с целыми записями.'''
+    with open(path, 'rb') as file:
+        position = len(file.readline())
+        bounds = [position]
+        target = position + chunk_size
+        quoted = False
+        while True:
+            block = file.read(SPLIT_BLOCK_SIZE)
+            if not block:
+                break
+            index = 0
+            while index < len(block):
+                skip = max(target - (position + index), 0)
+                if index + skip >= len(block):
+                    quoted ^= block.count(b'"', index) % 2 == 1
+                    break
+                quoted ^= block.count(b'"', index, index + skip) % 2 == 1
+                index += skip
+                newline = block.find(b'\n', index)
+                if newline == -1:
+                    quoted ^= block.count(b'"', index) % 2 == 1
+                    break
+                quoted ^= block.count(b'"', index, newline) % 2 == 1
+                index = newline + 1
+                if not quoted:
+                    bounds.append(position + index)
+                    target = position + index + chunk_size
+            position += len(block)
+        if bounds[-1] < position:
+            bounds.append(position)
+    return list(zip(bounds, bounds[1:]))
+
+
+def read_range(path, start, end):
+    '''Читает записи CSV из диапазона байтов, заголовок - из начала файла.'''
+    with open(path, 'rb') as file:
+        header = next(csv.reader([file.readline().decode('utf-8')]))
+        file.seek(start)
+
+        def lines():
+            while file.tell() < end:
+                line = file.readline()
+                if not line:
+                    return
+                yield line.decode('utf-8')
+
+        reader = csv.reader(lines())
+        for row in reader:
+            yield reader.line_num, dict(zip(header, row))
+
+
+def checkpoint_path(checkpoint_dir, table_name, start, end):
+    return os.path.join(checkpoint_dir, f'{table_name}-{start}-{end}.json')
+
+
+def parse_chunk(table_name, path, start, end):
+    '''
+    Читает и проверяет один диапазон без обращений к базе на запись.
+    Возвращает значения полей корректных записей и ошибки остальных.
+    '''
+    table = TABLES_BY_NAME[table_name]
+    result = ImportResult(table)
+    started = time.monotonic()
+    batch = build_batch(
+        table, read_range(path, start, end), ForeignKeyResolver(), result
+    )
+    fields = table.model._meta.concrete_fields
+    return {
+        'start': start,
+        'end': end,
+        'rows': [
+            (line, {field.attname: getattr(obj, field.attname)
+                    for field in fields})
+            for line, obj in batch
+        ],
+        'skipped': result.skipped,
+        'errors': result.errors,
+        'seconds': time.monotonic() - started,
+    }
+
+
+def insert_chunk(table, chunk, batch_size, checkpoint_dir, resolver):
+    '''Вставляет прочитанный диапазон и сохраняет контрольную точку.'''
+    result = ImportResult(table)
+    result.skipped = chunk['skipped']
+    result.errors = chunk['errors']
+    started = time.monotonic()
+    rows = iter(chunk['rows'])
+    with keep_dates(table.model):
+        while True:
+            batch = [
+                (line, table.model(**values))
+                for line, values in islice(rows, batch_size)
+            ]
+            if not batch:
+                break
+            insert_batch(table, batch, resolver, result,
+                         ignore_conflicts=True)
+    summary = {
+        'start': chunk['start'],
+        'end': chunk['end'],
+        'processed': result.processed,
+        'skipped': result.skipped,
+        'errors': result.errors,
+        'seconds': chunk['seconds'] + time.monotonic() - started,
+        'resumed': False,
+    }
+    checkpoint = checkpoint_path(
+        checkpoint_dir, table.name, chunk['start'], chunk['end']
+    )
+    temporary = f'{checkpoint}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(summary, file)
+    os.replace(temporary, checkpoint)
+    return summary
+
+
+def read_checkpoint(checkpoint):
+    with open(checkpoint) as file:
+        summary = json.load(file)
+    summary['resumed'] = True
+    return summary
+
+
+def _init_worker():
+    connections.close_all()
+
+
+def parse_chunks(tasks, workers):
+    '''
+    Возвращает прочитанные диапазоны по порядку. Впереди вставки читается
+    не больше двух диапазонов на процесс, чтобы не держать в памяти файл.
+    '''
+    if workers <= 1:
+        for task in tasks:
+            yield parse_chunk(*task)
+        return
+    # Соединение родителя не должно использоваться в дочерних процессах,
+    # а fork избавляет их от повторной настройки Django.
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(parse_chunk, *task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def import_table_parallel(table, directory, checkpoint_dir, workers=1,
+                          chunk_size=DEFAULT_CHUNK_SIZE,
+                          batch_size=DEFAULT_BATCH_SIZE):
+    '''Загружает таблицу по частям, при workers > 1 читает их пулом.'''
+    path = os.path.join(directory, table.filename)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    summaries = {}
+    tasks = []
+    for start, end in split_csv(path, chunk_size):
+        checkpoint = checkpoint_path(checkpoint_dir, table.name, start, end)
+        if os.path.exists(checkpoint):
+            summaries[start] = read_checkpoint(checkpoint)
+        else:
+            tasks.append((table.name, path, start, end))
+    resolver = ForeignKeyResolver()
+    for chunk in parse_chunks(tasks, workers):
+        summaries[chunk['start']] = insert_chunk(
+            table, chunk, batch_size, checkpoint_dir, resolver
+        )
+    return [summaries[start] for start in sorted(summaries)]
+
+
+def clear_checkpoints(checkpoint_dir, table_name):
+    '''Удаляет контрольные точки полностью загруженной таблицы.'''
+    if not os.path.isdir(checkpoint_dir):
+        return
+    for name in os.listdir(checkpoint_dir):
+        if name.startswith(f'{table_name}-') and name.endswith('.json'):
+            os.remove(os.path.join(checkpoint_dir, name))
@@ -0,0 +1,74 @@
+'''
+Предрассчитанные рейтинги для /titles/top/ и /titles/trending/.
+
+top_score - байесовская оценка: средняя оценка произведения, сдвинутая
+к средней оценке всех отзывов тем сильнее, чем меньше у произведения
+отзывов (MIN_REVIEWS отзывов с общей средней оценкой добавляются к
+каждому). trending_score - сумма весов недавних отзывов, вес отзыва
+уменьшается вдвое каждые HALF_LIFE секунд, отзывы старше WINDOW не
+учитываются. Таблица пересчитывается целиком командой refresh_rankings
+по расписанию, а чтение берет одну страницу по индексу.
+'''
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Review, Title, TitleRanking
+
+
+def bayesian(total, count, prior_mean, prior_weight):
+    '''Средняя оценка с prior_weight добавленными оценками prior_mean.'''
+    return (total + prior_mean * prior_weight) / (count + prior_weight)
+
+
+def decay_weight(age, half_life):
+    return 0.5 ** (max(age, 0) / half_life)
+
+
+def compute_rankings(now):
+    options = settings.TITLE_RANKING
+    totals = Title.objects.aggregate(total=Sum('rating_sum'),
+                                     count=Sum('reviews_count'))
+    prior_mean = (totals['total'] / totals['count']
+                  if totals['count'] else 0)
+    trending = defaultdict(float)
+    recent = Review.objects.filter(
+        pub_date__gte=now - timedelta(seconds=options['WINDOW'])
+    ).values_list('title_id', 'pub_date')
+    for title_id, pub_date in recent.iterator():
+        trending[title_id] += decay_weight(
+            (now - pub_date).total_seconds(), options['HALF_LIFE']
+        )
+    titles = Title.objects.filter(reviews_count__gt=0).values_list(
+        'pk', 'rating_sum', 'reviews_count'
+    )
+    for pk, total, count in titles.iterator():
+        yield TitleRanking(
+            title_id=pk,
+            top_score=bayesian(total, count, prior_mean,
+                               options['MIN_REVIEWS']),
+            trending_score=trending.get(pk, 0.0),
+            computed=now,
+        )
+
+
+def refresh_rankings(now=None):
+    '''Пересчитывает таблицу рейтингов, возвращает число строк.'''
+    now = now or timezone.now()
+    rankings = compute_rankings(now)
+    batch_size = settings.TITLE_RANKING['BATCH_SIZE']
+    created = 0
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        while True:
+            batch = list(islice(rankings, batch_size))
+            if not batch:
+                break
+            TitleRanking.objects.bulk_create(batch)
+            created += len(batch)
+    return created
@@ -0,0 +1,84 @@
+'''Поддержка денормализованного рейтинга произведений.
+
+Сумма оценок, количество отзывов и средняя оценка хранятся в самой
+модели Title и меняются одним UPDATE при каждом изменении отзыва,
+поэтому при чтении списка произведений не нужна агрегация по отзывам.
+'''
+from django.db.models import (Case, Count, F, FloatField, OuterRef, Q,
+                              Subquery, Sum, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import Review, Title
+
+
+def shifted_rating(score_delta, count_delta):
+    '''
+    Значения для UPDATE, сдвигающего rating_sum, reviews_count и rating
+    на дельту. Подходит любой модели с этими тремя полями.
+    '''
+    new_sum = F('rating_sum') + score_delta
+    new_count = F('reviews_count') + count_delta
+    return {
+        'rating_sum': new_sum,
+        'reviews_count': new_count,
+        'rating': Case(
+            When(Q(reviews_count__lte=-count_delta), then=None),
+            default=Cast(new_sum, FloatField()) / new_count,
+            output_field=FloatField(),
+        ),
+    }
+
+
+def change_rating(title_id, score_delta, count_delta):
+    '''Атомарно сдвигает сохраненный рейтинг произведения на дельту.'''
+    return Title.objects.filter(pk=title_id).update(
+        updated=timezone.now(),
+        **shifted_rating(score_delta, count_delta),
+    )
+
+
+def touch_title(title_id):
+    '''Отмечает изменение отзывов, не затронувшее рейтинг.'''
+    return Title.objects.filter(pk=title_id).update(updated=timezone.now())
+
+
+def _review_aggregate(aggregate, output_field=None):
+    reviews = (Review.objects.filter(title=OuterRef('pk'))
+               .order_by().values('title'))
+    return Subquery(reviews.annotate(value=aggregate).values('value'),
+                    output_field=output_field)
+
+
+def actual_ratings():
+    '''Выражения для значений рейтинга, посчитанных по самим отзывам.'''
+    return {
+        'actual_sum': Coalesce(_review_aggregate(Sum('score')), 0),
+        'actual_count': Coalesce(_review_aggregate(Count('id')), 0),
+    }
+
+
+def recalculate_ratings(titles=None):
+    '''Пересчитывает рейтинг заново по отзывам одним запросом.'''
+    if titles is None:
+        titles = Title.objects.all()
+    actual = actual_ratings()
+    return titles.update(
+        updated=timezone.now(),
+        rating_sum=actual['actual_sum'],
+        reviews_count=actual['actual_count'],
+        rating=Cast(actual['actual_sum'], FloatField())
+        / _review_aggregate(Count('id')),
+    )
+
+
+def find_rating_mismatches(titles=None):
+    '''Возвращает произведения, у которых сохраненный рейтинг устарел.'''
+    if titles is None:
+        titles = Title.objects.all()
+    return titles.annotate(**actual_ratings()).filter(
+        ~Q(rating_sum=F('actual_sum'))
+        | ~Q(reviews_count=F('actual_count'))
+        | Q(reviews_count=0, rating__isnull=False)
+        | Q(reviews_count__gt=0, rating__isnull=True)
+    )
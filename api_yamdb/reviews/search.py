@@ -0,0 +1,125 @@
+'''
+Полнотекстовый поиск по произведениям и отзывам.
+
+На SQLite используется виртуальная таблица FTS5 reviews_search, которую
+триггеры из миграции 0005 синхронизируют с reviews_title и
+reviews_review. rowid в индексе: 2 * id для произведения и
+2 * id + 1 для отзыва. На других базах поиск выполняется через
+icontains без ранжирования.
+'''
+import re
+from abc import ABC, abstractmethod
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Review, Title
+
+TITLE = 'title'
+REVIEW = 'review'
+KINDS = (TITLE, REVIEW)
+SNIPPET_TOKENS = 12
+
+
+def to_match_query(query):
+    '''Переводит запрос пользователя в безопасный запрос FTS5 с префиксами.'''
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchResults(ABC):
+    '''
+    Ленивый результат поиска с интерфейсом count() и срезов,
+    которого достаточно стандартной пагинации DRF.
+    '''
+
+    def __init__(self, query, kind=None):
+        self.query = query
+        self.kind = kind
+
+    @abstractmethod
+    def count(self):
+        '''Количество найденных объектов.'''
+
+    @abstractmethod
+    def __getitem__(self, item):
+        '''Страница результатов для среза item.'''
+
+
+class FtsSearchResults(SearchResults):
+
+    def _where(self):
+        sql = 'reviews_search MATCH %s'
+        params = [to_match_query(self.query)]
+        if self.kind:
+            sql += ' AND kind = %s'
+            params.append(self.kind)
+        return sql, params
+
+    def count(self):
+        if not to_match_query(self.query):
+            return 0
+        where, params = self._where()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM reviews_search WHERE {where}', params
+            )
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, item):
+        if not to_match_query(self.query):
+            return []
+        where, params = self._where()
+        limit = item.stop - item.start
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT s.kind, s.object_id, s.title_id, t.name, '
+                f"snippet(reviews_search, -1, '', '', '…', {SNIPPET_TOKENS}), "
+                'bm25(reviews_search, 10.0, 1.0) AS rank '
+                'FROM reviews_search AS s '
+                'LEFT JOIN reviews_title AS t ON t.id = s.title_id '
+                f'WHERE {where} ORDER BY rank LIMIT %s OFFSET %s',
+                params + [limit, item.start],
+            )
+            columns = ('type', 'id', 'title_id', 'name', 'snippet', 'rank')
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+class LikeSearchResults(SearchResults):
+    '''Запасной вариант для баз без FTS5.'''
+
+    def _querysets(self):
+        words = re.findall(r'\w+', self.query)
+        titles, reviews = Q(), Q()
+        for word in words:
+            titles &= Q(name__icontains=word) | Q(description__icontains=word)
+            reviews &= Q(text__icontains=word)
+        result = []
+        if words and self.kind in (None, TITLE):
+            result.append((TITLE, Title.objects.filter(titles)))
+        if words and self.kind in (None, REVIEW):
+            result.append((REVIEW, Review.objects.filter(
+                reviews
+            ).select_related('title')))
+        return result
+
+    def count(self):
+        return sum(queryset.count() for _, queryset in self._querysets())
+
+    def __getitem__(self, item):
+        rows = []
+        for kind, queryset in self._querysets():
+            for obj in queryset.order_by('pk')[:item.stop]:
+                title = obj if kind == TITLE else obj.title
+                text = obj.description if kind == TITLE else obj.text
+                rows.append({
+                    'type': kind, 'id': obj.pk, 'title_id': title.pk,
+                    'name': title.name, 'snippet': text[:200], 'rank': 0,
+                })
+        return rows[item.start:item.stop]
+
+
+def search(query, kind=None):
+    if connection.vendor == 'sqlite':
+        return FtsSearchResults(query, kind)
+    return LikeSearchResults(query, kind)
@@ -0,0 +1,118 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from . import lookups
+from .models import Category, CategoryStats, Genre, GenreStats, Review, Title
+from .rating import change_rating, recalculate_ratings, touch_title
+from .stats import change_stats, is_deferred, refresh_stats
+
+
+def _change(title_id, score_delta, count_delta):
+    if is_deferred():
+        return
+    change_rating(title_id, score_delta, count_delta)
+    change_stats(title_id, score_delta, count_delta)
+
+
+def _remember_rating(review):
+    review._loaded_title_id = review.title_id
+    review._loaded_score = review.score
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    '''Учитывает новый или измененный отзыв в рейтинге произведения.'''
+    if raw:
+        return
+    if created:
+        _change(instance.title_id, instance.score, 1)
+    elif not hasattr(instance, '_loaded_score'):
+        recalculate_ratings(Title.objects.filter(pk=instance.title_id))
+        title = instance.title
+        refresh_stats(title.genre_ids, [title.category_id])
+    elif instance._loaded_title_id != instance.title_id:
+        _change(instance._loaded_title_id, -instance._loaded_score, -1)
+        _change(instance.title_id, instance.score, 1)
+    elif instance._loaded_score != instance.score:
+        _change(instance.title_id, instance.score - instance._loaded_score, 0)
+    else:
+        touch_title(instance.title_id)
+    _remember_rating(instance)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    '''Исключает удаленный отзыв из рейтинга произведения.'''
+    title_id = getattr(instance, '_loaded_title_id', instance.title_id)
+    score = getattr(instance, '_loaded_score', instance.score)
+    _change(title_id, -score, -1)
+
+
+@receiver(post_save, sender=Title)
+def update_stats_on_title_save(sender, instance, created, raw=False,
+                               **kwargs):
+    '''Пересчитывает статистику категорий, состав которых изменился.'''
+    if raw or is_deferred():
+        return
+    loaded = getattr(instance, '_loaded_category_id', None)
+    if created or loaded != instance.category_id:
+        refresh_stats([], [loaded, instance.category_id])
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(pre_delete, sender=Title)
+def remember_title_genres(sender, instance, **kwargs):
+    '''Связи с жанрами удаляются раньше post_delete произведения.'''
+    if is_deferred():
+        return
+    instance.__dict__.pop('genre_ids', None)
+    instance._deleted_genre_ids = instance.genre_ids
+
+
+@receiver(post_delete, sender=Title)
+def update_stats_on_title_delete(sender, instance, **kwargs):
+    if is_deferred():
+        return
+    refresh_stats(getattr(instance, '_deleted_genre_ids', None) or [],
+                  [instance.category_id])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_stats_on_genres_change(sender, instance, action, reverse, pk_set,
+                                  **kwargs):
+    '''Пересчитывает статистику жанров, состав которых изменился.'''
+    if is_deferred():
+        return
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_stats([instance.pk], [])
+        return
+    instance.__dict__.pop('genre_ids', None)
+    if action == 'pre_clear':
+        instance._cleared_genre_ids = instance.genre_ids
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_genre_ids', ())
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if pk_set:
+        refresh_stats(pk_set, [])
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        model = GenreStats if sender is Genre else CategoryStats
+        model.objects.get_or_create(pk=instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Genre)
+@receiver((post_save, post_delete), sender=Category)
+def invalidate_lookups(sender, **kwargs):
+    '''Справочник перечитывается только после фиксации транзакции.'''
+    transaction.on_commit(partial(lookups.invalidate, sender))
@@ -0,0 +1,150 @@
+'''
+Материализованная статистика по жанрам и категориям.
+
+Для каждого жанра и категории в таблицах GenreStats и CategoryStats
+хранятся количество произведений и отзывов, средняя оценка и список
+лучших произведений. Изменение отзыва сдвигает суммы одним UPDATE, как
+и рейтинг самого произведения; список лучших пересчитывается только
+если произведение в него входит или может войти. Изменение состава
+группы (создание, удаление произведения, смена категории и жанров)
+пересчитывает затронутые группы целиком.
+'''
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import CategoryStats, GenreStats, Title
+from .rating import shifted_rating
+
+_state = threading.local()
+
+
+@contextmanager
+def deferred():
+    '''
+    Отключает пересчет рейтинга и статистики в сигналах на время
+    массовой записи; вызывающий код пересчитывает их сам один раз.
+    '''
+    _state.deferred = True
+    try:
+        yield
+    finally:
+        _state.deferred = False
+
+
+def is_deferred():
+    return getattr(_state, 'deferred', False)
+
+
+def top_size():
+    return settings.TITLE_STATS['TOP_SIZE']
+
+
+def _top(model, group_id):
+    return list(
+        Title.objects.filter(**{model.title_field: group_id},
+                             rating__isnull=False)
+        .order_by('-rating', 'pk')
+        .values_list('pk', 'rating')[:top_size()]
+    )
+
+
+def _top_values(top):
+    return {
+        'top_titles': ','.join(str(pk) for pk, _ in top),
+        'top_threshold': top[-1][1] if top else None,
+    }
+
+
+def refresh_top(stats):
+    '''Пересчитывает список лучших произведений группы.'''
+    values = _top_values(_top(type(stats), stats.pk))
+    for name, value in values.items():
+        setattr(stats, name, value)
+    stats.save(update_fields=(*values, 'updated'))
+
+
+def needs_top_refresh(stats, title_id, rating):
+    '''Может ли новый рейтинг произведения изменить список лучших.'''
+    top = stats.top_title_ids
+    if title_id in top:
+        return True
+    if rating is None:
+        return False
+    return (len(top) < top_size() or stats.top_threshold is None
+            or rating >= stats.top_threshold)
+
+
+def change_stats(title_id, score_delta, count_delta):
+    '''Учитывает изменение оценок произведения в статистике его групп.'''
+    title = (Title.objects.filter(pk=title_id)
+             .values('category_id', 'rating').first())
+    if title is None:
+        return
+    groups = {
+        GenreStats: list(Title.genre.through.objects.filter(
+            title_id=title_id
+        ).values_list('genre_id', flat=True)),
+        CategoryStats: [title['category_id']]
+        if title['category_id'] else [],
+    }
+    changes = shifted_rating(score_delta, count_delta)
+    for model, group_ids in groups.items():
+        if not group_ids:
+            continue
+        rows = model.objects.filter(pk__in=group_ids)
+        rows.update(**changes)
+        for stats in rows.only('pk', 'top_titles', 'top_threshold'):
+            if needs_top_refresh(stats, title_id, title['rating']):
+                refresh_top(stats)
+
+
+def _refresh(model, group_ids):
+    full = group_ids is None
+    if full:
+        group_model = model._meta.get_field(model.title_field).related_model
+        group_ids = group_model.objects.values_list('pk', flat=True)
+    group_ids = set(group_ids)
+    group_ids.discard(None)
+    if not group_ids:
+        return
+    field = model.title_field
+    totals = {
+        row[field]: row for row in Title.objects.filter(
+            **{f'{field}__in': group_ids}
+        ).order_by().values(field).annotate(
+            titles=Count('pk'), total=Sum('rating_sum'),
+            count=Sum('reviews_count'),
+        )
+    }
+    for group_id in group_ids:
+        row = totals.get(group_id, {})
+        count = row.get('count') or 0
+        total = row.get('total') or 0
+        values = {
+            'titles_count': row.get('titles', 0),
+            'reviews_count': count,
+            'rating_sum': total,
+            'rating': total / count if count else None,
+            **_top_values(_top(model, group_id)),
+        }
+        if full:
+            model.objects.update_or_create(pk=group_id, defaults=values)
+        else:
+            # Строки статистики создаются вместе с жанром (категорией).
+            model.objects.filter(pk=group_id).update(
+                updated=timezone.now(), **values
+            )
+
+
+def refresh_stats(genre_ids=None, category_ids=None):
+    '''
+    Пересчитывает статистику групп заново по произведениям. None -
+    все жанры (категории) с созданием недостающих строк, пустой
+    список - ни одного.
+    '''
+    _refresh(GenreStats, genre_ids)
+    _refresh(CategoryStats, category_ids)
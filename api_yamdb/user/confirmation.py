@@ -0,0 +1,86 @@
+'''
+Коды подтверждения для получения токена.
+
+Код - короткая случайная строка с ограниченным сроком действия. В базе
+хранится только HMAC от имени пользователя и кода с уникальным индексом,
+поэтому проверка кода - один запрос по индексу, а просроченные коды
+удаляются одним DELETE. Попытки считаются в кэше по имени пользователя
+атомарным add/incr до проверки кода, успешная сбрасывает счетчик: после
+MAX_ATTEMPTS ошибок проверка временно запрещена.
+'''
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .models import ConfirmationCode
+
+CODE_CHARS = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+ATTEMPTS_KEY = 'confirmation-code:attempts:{}'
+
+
+def make_digest(username, code):
+    message = f'{username}\0{code.strip().upper()}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message,
+                    hashlib.sha256).hexdigest()
+
+
+def issue_code(user):
+    '''Создает новый код пользователя взамен прежних и возвращает его.'''
+    options = settings.CONFIRMATION_CODE
+    code = get_random_string(options['LENGTH'], CODE_CHARS)
+    ConfirmationCode.objects.filter(user=user).delete()
+    ConfirmationCode.objects.create(
+        user=user,
+        digest=make_digest(user.username, code),
+        expires_at=timezone.now() + timedelta(seconds=options['TTL']),
+    )
+    return code
+
+
+def verify_code(username, code):
+    '''
+    Возвращает пользователя, если код верный и не просрочен, иначе None.
+    Использованный код удаляется.
+    '''
+    confirmation = ConfirmationCode.objects.select_related('user').filter(
+        digest=make_digest(username, code), expires_at__gt=timezone.now()
+    ).first()
+    if confirmation is None:
+        return None
+    confirmation.delete()
+    return confirmation.user
+
+
+def purge_expired():
+    '''Удаляет все просроченные коды, возвращает их количество.'''
+    deleted, _ = ConfirmationCode.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
+
+
+def take_attempt(username):
+    '''
+    Засчитывает попытку проверки кода; False, если попытки исчерпаны.
+    Счетчик увеличивается атомарно, поэтому параллельные запросы не
+    получат больше MAX_ATTEMPTS попыток.
+    '''
+    options = settings.CONFIRMATION_CODE
+    key = ATTEMPTS_KEY.format(username)
+    attempts = 1
+    if not cache.add(key, attempts, timeout=options['ATTEMPTS_WINDOW']):
+        try:
+            attempts = cache.incr(key)
+        except ValueError:
+            # Счетчик истек между add и incr.
+            cache.add(key, attempts, timeout=options['ATTEMPTS_WINDOW'])
+    return attempts <= options['MAX_ATTEMPTS']
+
+
+def reset_failures(username):
+    cache.delete(ATTEMPTS_KEY.format(username))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from user.confirmation import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные коды подтверждения'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено просроченных кодов: {deleted}'
+        ))
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+import user.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_confirmationcode'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', user.models.UserQuerySetManager()),
+            ],
+        ),
+    ]
@@ -1,5 +1,6 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.dispatch import Signal
 
 from .validators import validate_user
 
@@ -13,6 +14,24 @@ USER_ROLE = (
     (ADMIN, 'admin'),
 )
 
+# QuerySet.update() не отправляет post_save, поэтому об измененных
+# пользователях (user_ids) сообщает отдельный сигнал.
+users_updated = Signal()
+
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        if user_ids:
+            users_updated.send(sender=self.model, user_ids=user_ids)
+        return rows
+
+
+class UserQuerySetManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
 
 class User(AbstractUser):
     username = models.CharField(max_length=100,
@@ -25,9 +44,6 @@ class User(AbstractUser):
                               help_text='Укажите email',
                               unique=True,
                               null=False)
-    confirmation_code = models.CharField(max_length=40,
-                                         blank=True,
-                                         verbose_name='Проверочный код')
     first_name = models.CharField(max_length=100,
                                   verbose_name='Имя',
                                   help_text='Укажите Имя',
@@ -46,6 +62,8 @@ class User(AbstractUser):
                             default=USER,
                             help_text='Роль пользователя')
 
+    objects = UserQuerySetManager()
+
     def __str__(self):
         return self.username
 
@@ -60,3 +78,26 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+
+
+class ConfirmationCode(models.Model):
+    '''Модель кода подтверждения, хранится только его хэш'''
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='confirmation_codes',
+                             verbose_name='Пользователь')
+    digest = models.CharField(max_length=64,
+                              unique=True,
+                              verbose_name='Хэш кода',
+                              help_text='HMAC от имени пользователя и кода')
+    expires_at = models.DateTimeField(db_index=True,
+                                      verbose_name='Действует до')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Дата создания')
+
+    class Meta:
+        verbose_name = 'Код подтверждения'
+        verbose_name_plural = 'Коды подтверждения'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.expires_at}'
@@ -0,0 +1,164 @@
+'''
+Запуск замеров API на сгенерированных данных.
+
+    python benchmarks/run.py --titles 5000 --output before.json
+    python benchmarks/run.py --titles 5000 --output after.json \
+        --compare before.json
+
+Данные создаются во временной тестовой базе, рабочая база не
+затрагивается. Ограничение частоты запросов на время замеров
+отключается, письма пишутся в память.
+'''
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmarks')
+
+COMPARED = (
+    ('throughput_rps', None),
+    ('latency_ms', 'p50'),
+    ('latency_ms', 'p99'),
+    ('queries', 'mean'),
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--categories', type=int, default=10)
+    parser.add_argument('--genres', type=int, default=30)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--reviews-per-title', type=int, default=5)
+    parser.add_argument('--comments-per-review', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=200,
+                        help='Запросов в каждом сценарии')
+    parser.add_argument('--scenarios', nargs='+',
+                        help='Только указанные сценарии')
+    parser.add_argument('--no-response-cache', action='store_true',
+                        help='Выключить кэш ответов')
+    parser.add_argument('--output', help='Файл для результатов в JSON')
+    parser.add_argument('--compare',
+                        help='JSON прошлого запуска для сравнения')
+    return parser.parse_args(argv)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(options):
+    '''Заполняет базу и выполняет сценарии, возвращает отчет.'''
+    from django.conf import settings
+    from django.db import connection
+
+    from benchmarks.scenarios import Scenarios
+    from benchmarks.seed import Scale, seed
+
+    scale = Scale(
+        titles=options.titles, categories=options.categories,
+        genres=options.genres, users=options.users,
+        reviews_per_title=options.reviews_per_title,
+        comments_per_review=options.comments_per_review, seed=options.seed,
+    )
+    started = time.perf_counter()
+    counts = seed(scale)
+    seed_seconds = time.perf_counter() - started
+    scenarios = Scenarios(iterations=options.iterations, seed=options.seed)
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'response_cache': settings.RESPONSE_CACHE['ENABLED'],
+            'iterations': options.iterations,
+            'scale': scale.as_dict(),
+        },
+        'seed': {'objects': counts, 'seconds': round(seed_seconds, 3)},
+        'scenarios': scenarios.run(options.scenarios),
+    }
+
+
+def compare(old, new):
+    '''Строки с изменением ключевых показателей по сценариям.'''
+    lines = []
+    for name, result in new['scenarios'].items():
+        previous = old['scenarios'].get(name)
+        if previous is None:
+            continue
+        changes = []
+        for group, key in COMPARED:
+            before, after = previous[group], result[group]
+            if key is not None:
+                before, after = before[key], after[key]
+            label = f'{group}.{key}' if key else group
+            if before:
+                changes.append(
+                    f'{label} {before} -> {after} '
+                    f'({(after - before) / before * 100:+.1f}%)'
+                )
+        lines.append(f'{name}: ' + ', '.join(changes))
+    return lines
+
+
+def main(argv=None):
+    options = parse_args(argv)
+
+    import django
+    from django.test.utils import (override_settings, setup_databases,
+                                   setup_test_environment,
+                                   teardown_databases,
+                                   teardown_test_environment)
+
+    django.setup()
+    from django.conf import settings
+
+    setup_test_environment()
+    overrides = override_settings(
+        REST_FRAMEWORK=dict(settings.REST_FRAMEWORK,
+                            DEFAULT_THROTTLE_RATES={}),
+        RESPONSE_CACHE=dict(
+            settings.RESPONSE_CACHE,
+            ENABLED=(settings.RESPONSE_CACHE['ENABLED']
+                     and not options.no_response_cache),
+        ),
+    )
+    overrides.enable()
+    databases = setup_databases(verbosity=0, interactive=False)
+    try:
+        report = benchmark(options)
+    finally:
+        teardown_databases(databases, verbosity=0)
+        overrides.disable()
+        teardown_test_environment()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+    else:
+        print(output)
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as file:
+            for line in compare(json.load(file), report):
+                print(line, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+'''
+Сценарии замеров горячих путей API.
+
+Каждый сценарий выполняет `iterations` запросов тестовым клиентом
+Django и возвращает пропускную способность, перцентили задержки,
+число SQL-запросов и коды ответов. Все случайные выборы делаются
+генератором с фиксированным seed.
+'''
+import random
+import time
+from collections import Counter
+from functools import partial
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import access_token_for
+from reviews.models import Review, Title
+from user.confirmation import issue_code
+from user.models import User
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, percent):
+    '''Перцентиль методом ближайшего ранга.'''
+    ordered = sorted(values)
+    rank = max(1, round(len(ordered) * percent / 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies, queries, statuses, seconds):
+    latencies_ms = [latency * 1000 for latency in latencies]
+    result = {
+        'requests': len(latencies),
+        'seconds': round(seconds, 4),
+        'throughput_rps': round(len(latencies) / seconds, 2)
+        if seconds else None,
+        'latency_ms': {
+            f'p{percent}': round(percentile(latencies_ms, percent), 3)
+            for percent in PERCENTILES
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2),
+            'max': max(queries),
+        },
+        'statuses': {
+            str(code): count for code, count in sorted(statuses.items())
+        },
+    }
+    result['latency_ms']['max'] = round(max(latencies_ms), 3)
+    result['latency_ms']['mean'] = round(
+        sum(latencies_ms) / len(latencies_ms), 3
+    )
+    return result
+
+
+def measure(requests):
+    '''Выполняет запросы (вызываемые объекты без аргументов) и замеряет.'''
+    latencies, queries, statuses = [], [], Counter()
+    started = time.perf_counter()
+    for request in requests:
+        with CaptureQueriesContext(connection) as context:
+            request_started = time.perf_counter()
+            response = request()
+            latencies.append(time.perf_counter() - request_started)
+        queries.append(len(context))
+        statuses[response.status_code] += 1
+    return summarize(latencies, queries, statuses,
+                     time.perf_counter() - started)
+
+
+def authorized_client(user):
+    client = Client()
+    client.defaults['HTTP_AUTHORIZATION'] = (
+        f'Bearer {access_token_for(user)}'
+    )
+    return client
+
+
+class Scenarios:
+    '''Набор сценариев поверх заполненной базы.'''
+
+    def __init__(self, iterations=200, seed=42):
+        self.iterations = iterations
+        self.rng = random.Random(seed)
+        self.client = Client()
+        self.title_ids = list(Title.objects.values_list('pk', flat=True))
+        self.review_keys = list(Review.objects.values_list('title_id', 'pk'))
+        self.years = sorted(set(Title.objects.values_list('year', flat=True)))
+        reader = User.objects.order_by('pk').first()
+        self.reader = authorized_client(reader)
+
+    def names(self):
+        return [name[len('bench_'):] for name in dir(self)
+                if name.startswith('bench_')]
+
+    def run(self, names=None):
+        results = {}
+        for name in names or self.names():
+            results[name] = measure(getattr(self, f'bench_{name}')())
+        return results
+
+    def _get(self, client, url_factory):
+        return [
+            partial(client.get, url_factory())
+            for _ in range(self.iterations)
+        ]
+
+    def bench_titles_list(self):
+        pages = max(1, len(self.title_ids) // 10)
+        return self._get(self.client, lambda: (
+            f'/api/v1/titles/?page={self.rng.randint(1, pages)}'
+        ))
+
+    def bench_titles_filter(self):
+        return self._get(self.client, lambda: (
+            f'/api/v1/titles/?genre=genre-{self.rng.randint(1, 5)}'
+            f'&category=category-{self.rng.randint(1, 3)}'
+            f'&year={self.rng.choice(self.years)}'
+        ))
+
+    def bench_titles_top(self):
+        return self._get(self.client, lambda: '/api/v1/titles/top/?cursor=')
+
+    def bench_titles_retrieve(self):
+        return self._get(self.reader, lambda: (
+            f'/api/v1/titles/{self.rng.choice(self.title_ids)}/'
+        ))
+
+    def bench_reviews_list(self):
+        return self._get(self.reader, lambda: (
+            f'/api/v1/titles/{self.rng.choice(self.title_ids)}/reviews/'
+        ))
+
+    def bench_comments_list(self):
+        def url():
+            title_id, review_id = self.rng.choice(self.review_keys)
+            return f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        return self._get(self.reader, url)
+
+    def bench_reviews_create(self):
+        requests = []
+        for index in range(self.iterations):
+            writer = User.objects.create(
+                username=f'bench_writer{index}',
+                email=f'bench_writer{index}@yamdb.fake',
+            )
+            client = authorized_client(writer)
+            url = f'/api/v1/titles/{self.rng.choice(self.title_ids)}/reviews/'
+            data = {'text': 'Отзыв для замера',
+                    'score': self.rng.randint(1, 10)}
+            requests.append(partial(client.post, url, data))
+        return requests
+
+    def bench_signup(self):
+        return [
+            partial(self.client.post, '/api/v1/auth/signup/', {
+                'username': f'bench_signup{index}',
+                'email': f'bench_signup{index}@yamdb.fake',
+            })
+            for index in range(self.iterations)
+        ]
+
+    def bench_token(self):
+        users = list(User.objects.order_by('pk')[:self.iterations])
+        codes = [(user.username, issue_code(user)) for user in users]
+        return [
+            partial(self.client.post, '/api/v1/auth/token/', {
+                'username': username, 'confirmation_code': code,
+            })
+            for username, code in codes
+        ]
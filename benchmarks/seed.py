@@ -0,0 +1,128 @@
+'''
+Генератор данных для замеров.
+
+Заполняет пустую базу заданным количеством категорий, жанров,
+пользователей, произведений, отзывов и комментариев. Генератор
+случайных чисел инициализируется `seed`, поэтому при одинаковых
+параметрах данные совпадают от запуска к запуску. id назначаются явно:
+bulk_create на SQLite не возвращает первичные ключи.
+'''
+import random
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from reviews import lookups
+from reviews.csv_import import reset_sequences
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ranking import refresh_rankings
+from reviews.rating import recalculate_ratings
+from reviews.stats import refresh_stats
+from user.models import User
+
+BATCH_SIZE = 2000
+WORDS = (
+    'свет', 'ночь', 'город', 'море', 'время', 'дорога', 'сердце', 'огонь',
+    'тень', 'звезда', 'ветер', 'берег', 'песня', 'зеркало', 'сад', 'дом',
+)
+
+
+class Scale:
+    '''Размер набора данных.'''
+
+    def __init__(self, titles=1000, categories=10, genres=30, users=200,
+                 reviews_per_title=5, comments_per_review=2,
+                 genres_per_title=2, seed=42):
+        self.titles = titles
+        self.categories = categories
+        self.genres = genres
+        self.users = users
+        self.reviews_per_title = min(reviews_per_title, users)
+        self.comments_per_review = comments_per_review
+        self.genres_per_title = min(genres_per_title, genres)
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _bulk_create(model, objects):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            return
+        model.objects.bulk_create(batch)
+
+
+def seed(scale):
+    '''Заполняет базу и возвращает количество созданных объектов.'''
+    rng = random.Random(scale.seed)
+    password = make_password(None)
+    with transaction.atomic():
+        _bulk_create(Category, (
+            Category(id=pk, name=f'Категория {pk}', slug=f'category-{pk}')
+            for pk in range(1, scale.categories + 1)
+        ))
+        _bulk_create(Genre, (
+            Genre(id=pk, name=f'Жанр {pk}', slug=f'genre-{pk}')
+            for pk in range(1, scale.genres + 1)
+        ))
+        _bulk_create(User, (
+            User(id=pk, username=f'user{pk}', email=f'user{pk}@yamdb.fake',
+                 password=password)
+            for pk in range(1, scale.users + 1)
+        ))
+        _bulk_create(Title, (
+            Title(id=pk, name=f'{_text(rng, 2).capitalize()} {pk}',
+                  year=rng.randint(1950, 2020),
+                  description=_text(rng, 12),
+                  category_id=rng.randint(1, scale.categories))
+            for pk in range(1, scale.titles + 1)
+        ))
+        _bulk_create(Title.genre.through, (
+            Title.genre.through(title_id=title, genre_id=genre)
+            for title in range(1, scale.titles + 1)
+            for genre in rng.sample(range(1, scale.genres + 1),
+                                    scale.genres_per_title)
+        ))
+        reviews = (
+            Review(title_id=title, author_id=author,
+                   text=_text(rng, 20), score=rng.randint(1, 10))
+            for title in range(1, scale.titles + 1)
+            for author in rng.sample(range(1, scale.users + 1),
+                                     scale.reviews_per_title)
+        )
+        _bulk_create(Review, _numbered(reviews))
+        total_reviews = scale.titles * scale.reviews_per_title
+        _bulk_create(Comment, (
+            Comment(review_id=review,
+                    author_id=rng.randint(1, scale.users),
+                    text=_text(rng, 10))
+            for review in range(1, total_reviews + 1)
+            for _ in range(scale.comments_per_review)
+        ))
+        reset_sequences([Category, Genre, User, Title, Review])
+        recalculate_ratings()
+        refresh_stats()
+        refresh_rankings()
+    lookups.invalidate()
+    return {
+        'categories': scale.categories,
+        'genres': scale.genres,
+        'users': scale.users,
+        'titles': scale.titles,
+        'reviews': total_reviews,
+        'comments': total_reviews * scale.comments_per_review,
+    }
+
+
+def _numbered(objects, start=1):
+    for pk, obj in enumerate(objects, start):
+        obj.id = pk
+        yield obj
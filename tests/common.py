@@ -113,3 +113,14 @@ def create_comments(admin_client, admin):
     result.append({'id': create_comment(client_moderator, titles[0]["id"], reviews[0]["id"], 'qwerty321'),
                    'author': moderator.username, 'text': 'qwerty321'})
     return result, reviews, titles, user, moderator
+
+
+def stats_snapshot():
+    from reviews.models import CategoryStats, GenreStats
+
+    fields = ('titles_count', 'reviews_count', 'rating_sum', 'rating',
+              'top_titles', 'top_threshold')
+    return {
+        model.__name__: sorted(model.objects.values_list('pk', *fields))
+        for model in (GenreStats, CategoryStats)
+    }
@@ -0,0 +1,60 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from .common import auth_client, create_reviews
+
+
+class Test08Rating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_stored_on_title(self, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.reviews_count) == (12, 3), (
+            'Проверьте, что при создании отзыва у произведения обновляются '
+            'сохраненные сумма оценок и количество отзывов'
+        )
+        assert title.rating == 4, (
+            'Проверьте, что при создании отзыва у произведения обновляется сохраненный рейтинг'
+        )
+
+        auth_client(user).patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9}
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.reviews_count, title.rating) == (18, 3, 6), (
+            'Проверьте, что при изменении оценки отзыва пересчитывается сохраненный рейтинг'
+        )
+
+        for review in reviews:
+            admin_client.delete(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}/'
+            )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.reviews_count, title.rating) == (0, 0, None), (
+            'Проверьте, что после удаления всех отзывов рейтинг произведения равен `None`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recalculate_ratings_command(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        call_command('recalculate_ratings', '--check')
+
+        Review.objects.bulk_create([
+            Review(title_id=titles[1]['id'], author=user, text='bulk', score=8)
+        ])
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+
+        call_command('recalculate_ratings')
+        call_command('recalculate_ratings', '--check')
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.rating_sum, title.reviews_count, title.rating) == (8, 1, 8), (
+            'Проверьте, что команда `recalculate_ratings` пересчитывает рейтинг по отзывам'
+        )
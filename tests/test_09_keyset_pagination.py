@@ -0,0 +1,80 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+class Test09KeysetPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cursor(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/?cursor=&limit=1')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/?cursor=` возвращается статус 200'
+        )
+        data = response.json()
+        assert data['count'] is None and data['previous'] is None, (
+            'Проверьте, что в режиме курсора на первой странице нет `previous`, '
+            'а `count` не считается без параметра `count`'
+        )
+        names = [item['name'] for item in data['results']]
+        next_page = client.get(data['next']).json()
+        names += [item['name'] for item in next_page['results']]
+        assert names == sorted(title['name'] for title in titles), (
+            'Проверьте, что в режиме курсора произведения отсортированы по `name`'
+        )
+        assert next_page['next'] is None, (
+            'Проверьте, что на последней странице в режиме курсора нет `next`'
+        )
+        previous_page = client.get(next_page['previous']).json()
+        assert previous_page['results'] == data['results'], (
+            'Проверьте, что ссылка `previous` в режиме курсора ведет на предыдущую страницу'
+        )
+        data = client.get('/api/v1/titles/?cursor=&count=exact').json()
+        assert data['count'] == len(titles), (
+            'Проверьте, что при `count=exact` в режиме курсора возвращается точное количество'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_cursor(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?cursor=&limit=2'
+        ids = []
+        while url:
+            data = client.get(url).json()
+            ids += [item['id'] for item in data['results']]
+            url = data['next']
+        assert ids == [review['id'] for review in reviews], (
+            'Проверьте, что в режиме курсора отзывы возвращаются по `pub_date` без пропусков'
+        )
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/?cursor=broken'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что при неверном курсоре возвращается статус 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_tampered_cursor(self, client, admin_client, admin):
+        import base64
+        import json
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+
+        def cursor(key):
+            payload = json.dumps({'k': key, 'r': 0}).encode()
+            return base64.urlsafe_b64encode(payload).decode()
+
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for url, key in (
+            ('/api/v1/titles/', ['a', 'x']),
+            ('/api/v1/titles/', [None, None]),
+            ('/api/v1/titles/', [{'a': 1}, 1]),
+            (reviews_url, ['notadate', 1]),
+            (reviews_url, [{'a': 1}, 1]),
+        ):
+            response = client.get(f'{url}?cursor={cursor(key)}')
+            assert response.status_code == 404, (
+                'Проверьте, что курсор с неверными значениями ключа '
+                f'возвращает статус 404: {key}'
+            )
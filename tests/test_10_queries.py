@@ -0,0 +1,111 @@
+import pytest
+
+from .common import create_categories, create_genre
+
+
+def create_many_titles(admin_client, count):
+    from reviews.lookups import CATEGORIES, GENRES
+    from reviews.models import Category, Genre, Title
+
+    create_genre(admin_client)
+    create_categories(admin_client)
+    genres = list(Genre.objects.all())
+    category = Category.objects.first()
+    for index in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {index}', year=2000, category=category
+        )
+        title.genre.set(genres)
+    # Справочники жанров и категорий загружаются один раз на процесс
+    # и в счетчик запросов страницы не входят.
+    GENRES.get()
+    CATEGORIES.get()
+    return Title.objects.first()
+
+
+class Test10Queries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_list_queries(self, client, admin_client,
+                                    django_assert_num_queries):
+        create_many_titles(admin_client, 10)
+        # count, произведения, связи с жанрами
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 10, (
+            'Проверьте, что при GET запросе `/api/v1/titles/` возвращается страница произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_filtered_list_queries(self, client, admin_client,
+                                             django_assert_num_queries):
+        create_many_titles(admin_client, 10)
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/?genre=horror&category=films')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/` с фильтрами возвращается статус 200'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_detail_queries(self, client, admin_client,
+                                     django_assert_num_queries):
+        title = create_many_titles(admin_client, 1)
+        # версия для ETag, произведение, связи с жанрами
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert len(response.json()['genre']) == 3, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` возвращаются жанры произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_reviews_and_comments_list_queries(self, client, admin_client,
+                                                  django_user_model,
+                                                  django_assert_num_queries):
+        from reviews.models import Comment, Review
+
+        title = create_many_titles(admin_client, 1)
+        django_user_model.objects.bulk_create([
+            django_user_model(username=f'author{index}',
+                              email=f'author{index}@yamdb.fake')
+            for index in range(100)
+        ])
+        authors = list(django_user_model.objects.filter(
+            username__startswith='author'
+        ))
+        Review.objects.bulk_create([
+            Review(title=title, author=author, text='Отзыв', score=5)
+            for author in authors
+        ])
+        review = Review.objects.first()
+        Comment.objects.bulk_create([
+            Comment(review=review, author=author, text='Комментарий')
+            for author in authors
+        ])
+
+        # произведение, count, отзывы вместе с авторами
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/?limit=100'
+            )
+        results = response.json()['results']
+        assert len(results) == 100, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/` '
+            'возвращается страница из 100 отзывов'
+        )
+        assert {item['author'] for item in results} == {
+            author.username for author in authors
+        }, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/` '
+            'в поле `author` возвращается username автора'
+        )
+
+        # отзыв, count, комментарии вместе с авторами
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+                '?limit=100'
+            )
+        assert len(response.json()['results']) == 100, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/{review_id}/comments/` '
+            'возвращается страница из 100 комментариев'
+        )
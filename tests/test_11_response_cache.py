@@ -0,0 +1,77 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+class Test11ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cached_and_invalidated(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный GET запрос `/api/v1/titles/` отдается из кэша'
+        )
+        assert response.json()['count'] == 2
+
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2001, 'genre': [genres[0]['slug']],
+            'category': categories[0]['slug']
+        })
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что создание произведения инвалидирует кэш списка произведений'
+        )
+        assert response.json()['count'] == 3
+
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        admin_client.post('/api/v1/genres/', data={'name': 'Новый', 'slug': 'new'})
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение жанров инвалидирует кэш произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_invalidates_title(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] == 4
+        assert client.get(url)['X-Cache'] == 'HIT'
+        admin_client.delete(f'{url}reviews/{reviews[0]["id"]}/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS' and response.json()['rating'] == 3.5, (
+            'Проверьте, что удаление отзыва инвалидирует кэш произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cache_stats(self, client, admin_client, user_client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = user_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 403, (
+            'Проверьте, что статистика кэша доступна только администратору'
+        )
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.json() == {'hit': 1, 'miss': 1}, (
+            'Проверьте, что статистика кэша считает попадания и промахи'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalidated_after_commit(self):
+        from django.db import transaction
+
+        from api.cache import get_versions
+        from reviews.models import Title
+
+        version = get_versions(['titles'])
+        with transaction.atomic():
+            Title.objects.create(name='Фильм', year=2000)
+            assert get_versions(['titles']) == version, (
+                'Проверьте, что версия кэша не меняется до фиксации '
+                'транзакции, иначе в кэш попадут незаписанные данные'
+            )
+        assert get_versions(['titles']) != version, (
+            'Проверьте, что после фиксации транзакции кэш сбрасывается'
+        )
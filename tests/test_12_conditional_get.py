@@ -0,0 +1,55 @@
+import pytest
+
+from .common import create_reviews
+
+
+class Test12ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_etag(self, client, admin_client, admin,
+                           django_assert_num_queries):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag and response.has_header('Last-Modified'), (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` возвращаются ETag и Last-Modified'
+        )
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении ETag `/api/v1/titles/{title_id}/` возвращает статус 304'
+        )
+
+        admin_client.patch(f'{url}reviews/{reviews[0]["id"]}/', data={'text': 'Новый текст'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что после изменения отзыва ETag произведения меняется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_etag(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении ETag `/api/v1/titles/{title_id}/reviews/` возвращает статус 304'
+        )
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после удаления отзыва список отзывов отдается заново'
+        )
+        assert client.get('/api/v1/titles/0/reviews/').status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_etag_depends_on_query(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        response = client.get(f'{url}?limit=1', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что ETag зависит от параметров запроса'
+        )
+        assert len(response.json()['results']) == 1
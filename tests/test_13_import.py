@@ -0,0 +1,183 @@
+import csv
+import io
+import os
+
+import pytest
+from django.core.management import call_command
+
+from .conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def csv_rows(name):
+    with open(os.path.join(DATA_PATH, f'{name}.csv'), encoding='utf-8') as file:
+        return len(list(csv.DictReader(file)))
+
+
+def read_range_ids(name, start, end):
+    from reviews.parallel_import import read_range
+
+    path = os.path.join(DATA_PATH, f'{name}.csv')
+    return [row['id'] for _, row in read_range(path, start, end)]
+
+
+class Test13Import:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_csv(self):
+        from reviews.models import Comment, Genre, Review, Title
+        from user.models import User
+
+        call_command('import_csv', '--batch-size', '10')
+        for model, name in ((User, 'users'), (Genre, 'genre'), (Title, 'titles'),
+                            (Title.genre.through, 'genre_title'),
+                            (Review, 'review'), (Comment, 'comments')):
+            assert model.objects.count() == csv_rows(name), (
+                f'Проверьте, что команда `import_csv` загружает все записи из `{name}.csv`'
+            )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что команда `import_csv` сохраняет `pub_date` из файла'
+        )
+        assert ',' in Comment.objects.get(pk=1).text, (
+            'Проверьте, что команда `import_csv` правильно читает текст с запятыми в кавычках'
+        )
+        call_command('recalculate_ratings', '--check')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_import_skips_invalid_rows(self, tmp_path):
+        from reviews.models import Title
+
+        (tmp_path / 'category.csv').write_text('id,name,slug\n1,Фильм,movie\n', encoding='utf-8')
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n1,Есть,1994,movie\n2,Нет,1994,42\n3,Год,год,1\n',
+            encoding='utf-8'
+        )
+        call_command('import_csv', '--path', str(tmp_path), '--tables', 'category', 'titles')
+        assert list(Title.objects.values_list('name', 'category__slug')) == [('Есть', 'movie')], (
+            'Проверьте, что команда `import_csv` пропускает записи с ошибками '
+            'и находит категорию по slug'
+        )
+
+    def test_03_split_csv_keeps_records_whole(self):
+        from reviews.parallel_import import read_range, split_csv
+
+        path = os.path.join(DATA_PATH, 'review.csv')
+        chunks = split_csv(path, chunk_size=1500)
+        assert len(chunks) > 1
+        ids = [row['id'] for start, end in chunks for _, row in read_range(path, start, end)]
+        with open(path, encoding='utf-8') as file:
+            expected = [row['id'] for row in csv.DictReader(file)]
+        assert ids == expected, (
+            'Проверьте, что файл делится на части по границам записей'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_import_chunks_resume(self, tmp_path):
+        from reviews.models import Review, Title
+        from reviews.parallel_import import checkpoint_path, split_csv
+
+        checkpoints = tmp_path / 'checkpoints'
+        checkpoints.mkdir()
+        start, end = split_csv(os.path.join(DATA_PATH, 'review.csv'), 1500)[0]
+        with open(checkpoint_path(str(checkpoints), 'review', start, end), 'w') as file:
+            file.write('{"start": %d, "end": %d, "processed": 0, "skipped": 0, '
+                       '"errors": [], "seconds": 0}' % (start, end))
+
+        call_command('import_csv', '--chunk-size', '1500',
+                     '--checkpoint-dir', str(checkpoints))
+        assert Review.objects.count() < csv_rows('review'), (
+            'Проверьте, что части с контрольной точкой не загружаются повторно'
+        )
+        assert not list(checkpoints.iterdir()), (
+            'Проверьте, что после загрузки контрольные точки удаляются'
+        )
+
+        stderr = io.StringIO()
+        call_command('import_csv', '--chunk-size', '1500',
+                     '--checkpoint-dir', str(checkpoints), stderr=stderr)
+        assert Review.objects.count() == csv_rows('review'), (
+            'Проверьте, что повторная загрузка по частям не создает дублей'
+        )
+        assert Title.objects.count() == csv_rows('titles') and not stderr.getvalue(), (
+            'Проверьте, что при возобновлении полной загрузки уже загруженные '
+            'записи остальных таблиц пропускаются без ошибок'
+        )
+        call_command('recalculate_ratings', '--check')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_import_reports_conflicts(self, tmp_path):
+        from reviews.models import Title
+
+        (tmp_path / 'category.csv').write_text('id,name,slug\n1,Фильм,movie\n', encoding='utf-8')
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category,description\n'
+            '1,Первое,1994,1,Описание\n2,Второе,1995,1,\n',
+            encoding='utf-8'
+        )
+        call_command('import_csv', '--path', str(tmp_path), '--tables', 'category', 'titles')
+        assert Title.objects.get(pk=1).description == 'Описание', (
+            'Проверьте, что команда `import_csv` загружает `description` произведений'
+        )
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n2,Второе,1995,1\n3,Третье,1996,1\n',
+            encoding='utf-8'
+        )
+        call_command('import_csv', '--path', str(tmp_path), '--tables', 'titles')
+        assert sorted(Title.objects.values_list('pk', flat=True)) == [1, 2, 3], (
+            'Проверьте, что записи, которые уже есть в базе, пропускаются '
+            'и не прерывают загрузку остальных'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_report_and_cache(self, client):
+        call_command('import_csv', '--tables', 'category', 'genre')
+        assert client.get('/api/v1/titles/').json()['count'] == 0
+        call_command('import_csv', '--tables', 'titles')
+        assert client.get('/api/v1/titles/').json()['count'] == csv_rows('titles'), (
+            'Проверьте, что после загрузки кэш списка произведений сбрасывается'
+        )
+        stdout = io.StringIO()
+        call_command('import_csv', '--tables', 'titles', '--ignore-conflicts', stdout=stdout)
+        assert f'titles: обработано {csv_rows("titles")}, загружено 0,' in stdout.getvalue(), (
+            'Проверьте, что в отчете не считаются загруженными записи, '
+            'пропущенные из-за ignore_conflicts'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_import_workers(self, tmp_path):
+        from reviews.models import Comment, Review
+        from reviews.parallel_import import checkpoint_path, split_csv
+
+        checkpoints = tmp_path / 'checkpoints'
+        checkpoints.mkdir()
+        chunks = split_csv(os.path.join(DATA_PATH, 'comments.csv'), 1500)
+        start, end = chunks[-1]
+        with open(checkpoint_path(str(checkpoints), 'comments', start, end), 'w') as file:
+            file.write('{"start": %d, "end": %d, "processed": 0, "skipped": 0, '
+                       '"errors": [], "seconds": 0}' % (start, end))
+
+        stdout = io.StringIO()
+        call_command('import_csv', '--workers', '2', '--chunk-size', '1500',
+                     '--checkpoint-dir', str(checkpoints), stdout=stdout)
+        assert Review.objects.count() == csv_rows('review'), (
+            'Проверьте, что при загрузке в несколько процессов загружаются '
+            'все записи'
+        )
+        skipped = len(read_range_ids('comments', start, end))
+        assert Comment.objects.count() == csv_rows('comments') - skipped, (
+            'Проверьте, что при загрузке в несколько процессов части с '
+            'контрольной точкой не загружаются повторно'
+        )
+        assert 'comments: пропущено уже загруженных частей: 1' in stdout.getvalue()
+
+        stderr = io.StringIO()
+        call_command('import_csv', '--workers', '2', '--chunk-size', '1500',
+                     '--tables', 'comments',
+                     '--checkpoint-dir', str(checkpoints), stderr=stderr)
+        assert Comment.objects.count() == csv_rows('comments') and not stderr.getvalue(), (
+            'Проверьте, что повторная загрузка в несколько процессов '
+            'дозагружает пропущенные записи без дублей'
+        )
+        call_command('recalculate_ratings', '--check')
@@ -0,0 +1,36 @@
+import pytest
+
+from .common import create_reviews
+
+
+class Test15Search:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        response = client.get('/api/v1/search/?q=поворо')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/search/` возвращается статус 200'
+        )
+        data = response.json()
+        assert data['count'] == 1 and data['results'][0]['id'] == titles[0]['id'], (
+            'Проверьте, что поиск находит произведение по началу слова из названия'
+        )
+
+        data = client.get('/api/v1/search/?q=ДРАМА').json()
+        assert [item['type'] for item in data['results']] == ['title'], (
+            'Проверьте, что поиск находит произведение по описанию без учета регистра'
+        )
+
+        data = client.get('/api/v1/search/?q=qwerty32&type=review').json()
+        assert {item['id'] for item in data['results']} == {reviews[2]['id']}, (
+            'Проверьте, что параметр `type=review` ограничивает поиск отзывами'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        data = client.get('/api/v1/search/?q=поворо').json()
+        assert data['count'] == 0, (
+            'Проверьте, что удаленное произведение пропадает из поиска'
+        )
+        data = client.get('/api/v1/search/?q="*').json()
+        assert data['count'] == 0
@@ -0,0 +1,71 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?(?P<table>\w+)$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+def full_scans(client, url, sorted_table=None):
+    '''
+    Возвращает таблицы, которые запросы страницы читают целиком, и
+    запросы к sorted_table с сортировкой не по индексу.
+    '''
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    scans = []
+    with connection.cursor() as cursor:
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+            for row in cursor.fetchall():
+                match = FULL_SCAN.search(row[-1])
+                if match:
+                    scans.append((match.group('table'), query['sql']))
+                elif (row[-1] == TEMP_SORT
+                      and f'FROM "{sorted_table}"' in query['sql']):
+                    scans.append((TEMP_SORT, query['sql']))
+    return scans
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN есть только в SQLite')
+class Test16QueryPlans:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_hot_queries_use_indexes(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        for url, sorted_table in (
+            (f'/api/v1/titles/{title_id}/reviews/', None),
+            (f'/api/v1/titles/{title_id}/reviews/?cursor=', 'reviews_review'),
+            (f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/', None),
+            (f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/?cursor=', 'reviews_comment'),
+            ('/api/v1/titles/?category=films&year=2000', 'reviews_title'),
+            ('/api/v1/titles/?genre=horror', None),
+        ):
+            scans = full_scans(client, url, sorted_table)
+            assert not scans, (
+                f'Проверьте, что запросы `{url}` используют индексы, '
+                f'а не читают таблицы целиком: {scans}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_orderings_use_indexes(self, client, admin_client, admin):
+        create_comments(admin_client, admin)
+        for field in ('name', 'year', 'rating', 'reviews_count'):
+            for ordering in (field, f'-{field}'):
+                urls = [f'/api/v1/titles/?ordering={ordering}']
+                if field != 'rating':
+                    urls.append(f'/api/v1/titles/?ordering={ordering}&cursor=')
+                for url in urls:
+                    scans = full_scans(client, url, 'reviews_title')
+                    assert not scans, (
+                        f'Проверьте, что сортировка `{url}` идет по индексу, '
+                        f'без полного чтения таблицы и сортировки: {scans}'
+                    )
@@ -0,0 +1,170 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class FlakyBackend(EmailBackend):
+    '''Не отправляет письма на адреса из `broken`.'''
+    broken = {'broken@yamdb.fake'}
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.broken:
+                raise ConnectionError('relay is down')
+        return super().send_messages(messages)
+
+
+class Test17Outbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_enqueues_email(self, client):
+        from notifications.models import OutgoingEmail
+
+        outbox_before_count = len(mail.outbox)
+        response = client.post(self.url_signup, data={
+            'email': 'queued@yamdb.fake', 'username': 'queued'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что при регистрации письмо не отправляется в запросе, '
+            'а ставится в очередь'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient_list == ['queued@yamdb.fake']
+        assert email.status == OutgoingEmail.PENDING
+
+        call_command('send_emails')
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.SENT, (
+            'Проверьте, что команда `send_emails` отправляет письма из очереди'
+        )
+        assert mail.outbox[-1].to == ['queued@yamdb.fake']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_failed_email_is_retried_with_backoff(self, settings):
+        from notifications.models import OutgoingEmail
+        from notifications.outbox import enqueue_email, retry_delay, send_pending
+
+        settings.EMAIL_BACKEND = 'tests.test_17_outbox.FlakyBackend'
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MAX_ATTEMPTS=2)
+        FlakyBackend.opened = 0
+        for index in range(5):
+            enqueue_email('Тема', 'Текст', [f'user{index}@yamdb.fake'])
+        broken = enqueue_email('Тема', 'Текст', ['broken@yamdb.fake'])
+
+        batches = send_pending(batch_size=3)
+        assert [(batch.sent, batch.failed) for batch in batches] == [(3, 0), (2, 1)]
+        assert FlakyBackend.opened == 2, (
+            'Проверьте, что письма отправляются пачками через одно соединение'
+        )
+        broken.refresh_from_db()
+        assert broken.status == OutgoingEmail.PENDING
+        assert broken.attempts == 1
+        assert broken.last_error
+        earliest = timezone.now() + retry_delay(1) - timedelta(seconds=5)
+        assert broken.next_attempt_at > earliest, (
+            'Проверьте, что неотправленное письмо откладывается'
+        )
+        assert send_pending() == [], (
+            'Проверьте, что отложенное письмо не отправляется раньше срока'
+        )
+
+        OutgoingEmail.objects.filter(pk=broken.pk).update(
+            next_attempt_at=broken.created
+        )
+        assert [(batch.sent, batch.failed) for batch in send_pending()] == [(0, 1)]
+        broken.refresh_from_db()
+        assert broken.status == OutgoingEmail.FAILED, (
+            'Проверьте, что после MAX_ATTEMPTS попыток письмо помечается как неотправленное'
+        )
+
+    def test_03_retry_delay_grows(self, settings):
+        from notifications.outbox import retry_delay
+
+        settings.EMAIL_OUTBOX = dict(
+            settings.EMAIL_OUTBOX, RETRY_DELAY=10, MAX_RETRY_DELAY=60
+        )
+        assert [retry_delay(n).total_seconds() for n in range(1, 6)] == [
+            10, 20, 40, 60, 60
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rate_limit(self, monkeypatch):
+        from notifications import outbox
+        from notifications.models import EmailBatch
+
+        pauses = []
+        monkeypatch.setattr(outbox.time, 'sleep', pauses.append)
+        for index in range(5):
+            outbox.enqueue_email('Тема', 'Текст', [f'user{index}@yamdb.fake'])
+        batches = outbox.send_pending(batch_size=100, rate_limit=2)
+        assert [batch.size for batch in batches] == [2, 2, 1], (
+            'Проверьте, что пачка не превышает лимит писем в секунду'
+        )
+        assert len(pauses) == 3 and all(0 < pause <= 1 for pause in pauses[:2])
+        assert EmailBatch.objects.count() == 3, (
+            'Проверьте, что итоги каждой пачки сохраняются в `EmailBatch`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_moderation_notice(self, user_client, moderator_client, user):
+        from notifications.models import OutgoingEmail
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Фильм', year=2000)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        review_url = f'{url}{response.json()["id"]}/'
+
+        user_client.patch(review_url, data={'text': 'Правка автора'},
+                          content_type='application/json')
+        assert not OutgoingEmail.objects.exists(), (
+            'Проверьте, что автор не получает уведомление о собственной правке'
+        )
+        response = moderator_client.delete(review_url)
+        assert response.status_code == 204
+        notice = OutgoingEmail.objects.get()
+        assert notice.recipient_list == [user.email]
+        assert 'Фильм' in notice.body, (
+            'Проверьте, что автор отзыва получает уведомление, '
+            'когда модератор удаляет его отзыв'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_failure_inside_batch(self, settings):
+        from notifications.models import OutgoingEmail
+        from notifications.outbox import enqueue_email, send_pending
+
+        settings.EMAIL_BACKEND = 'tests.test_17_outbox.FlakyBackend'
+        FlakyBackend.opened = 0
+        outbox_before_count = len(mail.outbox)
+        first = enqueue_email('Тема', 'Текст', ['first@yamdb.fake'])
+        broken = enqueue_email('Тема', 'Текст', ['broken@yamdb.fake'])
+        last = enqueue_email('Тема', 'Текст', ['last@yamdb.fake'])
+
+        batches = send_pending(batch_size=3)
+        assert [(batch.sent, batch.failed) for batch in batches] == [(2, 1)]
+        assert FlakyBackend.opened == 1
+        assert [message.to for message in mail.outbox[outbox_before_count:]] == [
+            ['first@yamdb.fake'], ['last@yamdb.fake']
+        ], (
+            'Проверьте, что ошибка одного письма не мешает отправить '
+            'остальные письма пачки и не отправляет их повторно'
+        )
+        statuses = dict(OutgoingEmail.objects.values_list('pk', 'status'))
+        assert statuses == {
+            first.pk: OutgoingEmail.SENT,
+            broken.pk: OutgoingEmail.PENDING,
+            last.pk: OutgoingEmail.SENT,
+        }, 'Проверьте, что результат отправки сохраняется для каждого письма'
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class Test18ConfirmationCode:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    def signup(self, client, username):
+        response = client.post(self.url_signup, data={
+            'email': f'{username}@yamdb.fake', 'username': username
+        })
+        assert response.status_code == 200
+        call_command('send_emails')
+        return mail.outbox[-1].body.split()[0]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_code_is_single_use(self, client):
+        from user.models import ConfirmationCode
+
+        code = self.signup(client, 'coded')
+        confirmation = ConfirmationCode.objects.get()
+        assert code not in confirmation.digest, (
+            'Проверьте, что в базе хранится только хэш кода подтверждения'
+        )
+        data = {'username': 'coded', 'confirmation_code': code}
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 200 and response.json().get('token'), (
+            'Проверьте, что по коду из письма выдается токен'
+        )
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения нельзя использовать повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_verify_is_one_query(self, django_assert_num_queries, user):
+        from user.confirmation import issue_code, verify_code
+
+        code = issue_code(user)
+        with django_assert_num_queries(1):
+            assert verify_code(user.username, 'WRONG123') is None
+        with django_assert_num_queries(2):
+            assert verify_code(user.username, code.lower()) == user
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_expired_codes(self, client, user):
+        from user.confirmation import issue_code
+        from user.models import ConfirmationCode
+
+        code = issue_code(user)
+        ConfirmationCode.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = client.post(self.url_token, data={
+            'username': user.username, 'confirmation_code': code
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что просроченный код не принимается'
+        )
+        issue_code(user)
+        assert ConfirmationCode.objects.count() == 1, (
+            'Проверьте, что новый код заменяет прежние коды пользователя'
+        )
+        ConfirmationCode.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command('purge_confirmation_codes')
+        assert not ConfirmationCode.objects.exists(), (
+            'Проверьте, что команда `purge_confirmation_codes` удаляет просроченные коды'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_attempts_limit(self, client, settings):
+        settings.CONFIRMATION_CODE = dict(settings.CONFIRMATION_CODE, MAX_ATTEMPTS=3)
+        code = self.signup(client, 'guessed')
+        for _ in range(3):
+            response = client.post(self.url_token, data={
+                'username': 'guessed', 'confirmation_code': 'WRONG123'
+            })
+            assert response.status_code == 400
+        response = client.post(self.url_token, data={
+            'username': 'guessed', 'confirmation_code': code
+        })
+        assert response.status_code == 429, (
+            'Проверьте, что после нескольких неверных кодов проверка временно запрещена'
+        )
+        assert response.has_header('Retry-After')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_signup_again_issues_new_code(self, client):
+        from user.models import User
+
+        code = self.signup(client, 'returning')
+        client.post(self.url_token, data={
+            'username': 'returning', 'confirmation_code': code
+        })
+        new_code = self.signup(client, 'returning')
+        assert new_code != code and User.objects.filter(username='returning').count() == 1, (
+            'Проверьте, что повторная регистрация с теми же username и email '
+            'выдает новый код существующему пользователю'
+        )
+        response = client.post(self.url_token, data={
+            'username': 'returning', 'confirmation_code': new_code
+        })
+        assert response.status_code == 200, (
+            'Проверьте, что по новому коду выдается токен'
+        )
+        response = client.post(self.url_signup, data={
+            'email': 'other@yamdb.fake', 'username': 'returning'
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что занятый username с другим email не принимается'
+        )
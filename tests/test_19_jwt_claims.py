@@ -0,0 +1,137 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def claims_client(user):
+    from api.authentication import access_token_for
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}')
+    return client
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context)
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings, tmp_path):
+    # Токены с claims принимаются без базы только при общем для процессов
+    # кэше версий.
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+
+
+class Test19JwtClaims:
+    url_users = '/api/v1/users/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_claims_skip_user_query(self, admin, admin_client):
+        with_claims = count_queries(claims_client(admin), self.url_users)
+        without_claims = count_queries(admin_client, self.url_users)
+        assert with_claims == without_claims - 1, (
+            'Проверьте, что для токена с claims пользователь не загружается из базы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_applies_to_issued_tokens(self, admin_client, user):
+        client = claims_client(user)
+        assert client.get(self.url_users).status_code == 403
+
+        response = admin_client.patch(f'{self.url_users}{user.username}/',
+                                      data={'role': 'admin'})
+        assert response.status_code == 200
+        assert client.get(self.url_users).status_code == 200, (
+            'Проверьте, что изменение роли действует и для уже выданных токенов'
+        )
+
+        user.refresh_from_db()
+        client = claims_client(user)
+        user.role = 'user'
+        user.save()
+        assert client.get(self.url_users).status_code == 403, (
+            'Проверьте, что понижение роли действует и для уже выданных токенов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_me_returns_full_profile(self, user):
+        response = claims_client(user).get(f'{self.url_users}me/')
+        assert response.status_code == 200
+        assert response.json()['email'] == user.email
+        assert response.json()['bio'] == user.bio
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_inactive_user_is_rejected(self, user):
+        client = claims_client(user)
+        user.is_active = False
+        user.save()
+        assert client.get(f'{self.url_users}me/').status_code == 401, (
+            'Проверьте, что токен отключенного пользователя не принимается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_claims_user_can_write(self, user):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Фильм', year=2000)
+        response = claims_client(user).post(
+            f'/api/v1/titles/{title.pk}/reviews/', data={'text': 'Отзыв', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username, (
+            'Проверьте, что пользователь из токена сохраняется автором отзыва'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_queryset_update_revokes_tokens(self, admin):
+        from user.models import User
+
+        client = claims_client(admin)
+        assert client.get(self.url_users).status_code == 200
+        User.objects.filter(pk=admin.pk).update(role='user', is_staff=False,
+                                                is_superuser=False)
+        assert client.get(self.url_users).status_code == 403, (
+            'Проверьте, что изменение пользователей через QuerySet.update() '
+            'действует и для уже выданных токенов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_process_local_cache_loads_user(self, admin, admin_client,
+                                               settings):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        with_claims = count_queries(claims_client(admin), self.url_users)
+        without_claims = count_queries(admin_client, self.url_users)
+        assert with_claims == without_claims, (
+            'Проверьте, что с кэшем в памяти процесса пользователь токена '
+            'загружается из базы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_tokens_revoked_after_commit(self, admin):
+        from django.db import transaction
+
+        from api.authentication import get_token_version
+        from user.models import User
+
+        version = get_token_version(admin.pk)
+        with transaction.atomic():
+            admin.role = 'user'
+            admin.save()
+            User.objects.filter(pk=admin.pk).update(is_staff=False)
+            assert get_token_version(admin.pk) == version, (
+                'Проверьте, что версия токенов не меняется до фиксации '
+                'транзакции'
+            )
+        assert get_token_version(admin.pk) != version, (
+            'Проверьте, что после фиксации транзакции выданные токены '
+            'проверяются по базе'
+        )
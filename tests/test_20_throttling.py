@@ -0,0 +1,82 @@
+import pytest
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = dict(
+            settings.REST_FRAMEWORK,
+            DEFAULT_THROTTLE_RATES=dict(
+                settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates
+            ),
+        )
+    return set_rates
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    from api.throttling import TokenBucketThrottle
+
+    now = [1000.0]
+    monkeypatch.setattr(TokenBucketThrottle, 'timer', lambda self: now[0])
+    return now
+
+
+class Test20Throttling:
+    url_signup = '/api/v1/auth/signup/'
+    url_categories = '/api/v1/categories/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_bucket(self, client, rates, clock):
+        rates(signup='2/min')
+        for _ in range(2):
+            assert client.post(self.url_signup).status_code == 400
+        response = client.post(self.url_signup)
+        assert response.status_code == 429, (
+            'Проверьте, что частота запросов к `/api/v1/auth/signup/` ограничена'
+        )
+        assert int(response['Retry-After']) == 30, (
+            'Проверьте, что ответ 429 содержит заголовок `Retry-After`'
+        )
+        clock[0] += 30
+        assert client.post(self.url_signup).status_code == 400, (
+            'Проверьте, что ведро пополняется со временем'
+        )
+        assert client.post(self.url_signup).status_code == 429
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_anonymous_reads_only(self, client, user_client, rates, clock):
+        rates(anon_reads='1/min')
+        assert client.get(self.url_categories).status_code == 200
+        assert client.get(self.url_categories).status_code == 429, (
+            'Проверьте, что чтение анонимными пользователями ограничено по IP'
+        )
+        for _ in range(3):
+            assert user_client.get(self.url_categories).status_code == 200, (
+                'Проверьте, что ограничение анонимного чтения не действует '
+                'на авторизованных пользователей'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_writes_per_user(self, user_client, moderator_client, rates, clock):
+        rates(writes='1/h')
+        url = '/api/v1/users/me/'
+        data = {'bio': 'Новая биография'}
+        assert user_client.patch(url, data=data).status_code == 200
+        assert user_client.patch(url, data=data).status_code == 429, (
+            'Проверьте, что изменяющие запросы ограничены для каждого пользователя'
+        )
+        assert user_client.get(url).status_code == 200
+        assert moderator_client.patch(url, data=data).status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_stats(self, client, admin_client, user_client, rates, clock):
+        rates(signup='1/min')
+        client.post(self.url_signup)
+        client.post(self.url_signup)
+        assert user_client.get('/api/v1/throttle/stats/').status_code == 403
+        response = admin_client.get('/api/v1/throttle/stats/')
+        assert response.status_code == 200
+        assert response.json()['signup'] == {'allowed': 1, 'throttled': 1}, (
+            'Проверьте, что `/api/v1/throttle/stats/` показывает счетчики ограничений'
+        )
@@ -0,0 +1,55 @@
+import pytest
+
+
+class Test21Instrumentation:
+    url_metrics = '/api/v1/metrics/'
+
+    def test_01_histogram_percentiles(self):
+        from api.instrumentation import Histogram
+
+        histogram = Histogram((1, 2, 5, 10))
+        for value in [1] * 50 + [4] * 40 + [7] * 9 + [30]:
+            histogram.add(value)
+        summary = histogram.summary()
+        assert summary['count'] == 100
+        assert (summary['p50'], summary['p90'], summary['p99']) == (1, 5, 10)
+        assert summary['max'] == 30
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_disabled_by_default(self, admin_client):
+        from api import instrumentation
+
+        instrumentation.reset()
+        admin_client.get('/api/v1/titles/')
+        response = admin_client.get(self.url_metrics)
+        assert response.status_code == 200
+        assert response.json() == {'enabled': False, 'views': {}}, (
+            'Проверьте, что замеры выключены без настройки INSTRUMENTATION'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_records_actions(self, settings, admin_client, user_client):
+        from api import instrumentation
+
+        settings.INSTRUMENTATION = {'ENABLED': True}
+        instrumentation.reset()
+        for _ in range(3):
+            admin_client.get('/api/v1/titles/')
+        admin_client.post('/api/v1/genres/', data={'name': 'Жанр', 'slug': 'genre'})
+
+        assert user_client.get(self.url_metrics).status_code == 403
+        views = admin_client.get(self.url_metrics).json()['views']
+        assert views['TitleViewSet.list']['total_ms']['count'] == 3, (
+            'Проверьте, что запросы группируются по вьюсету и действию'
+        )
+        assert views['TitleViewSet.list']['db_queries']['max'] >= 1
+        assert set(views['TitleViewSet.list']) == {
+            'total_ms', 'db_ms', 'render_ms', 'db_queries'
+        }
+        assert 'GenreViewSet.create' in views
+
+        assert admin_client.delete(self.url_metrics).status_code == 204
+        views = admin_client.get(self.url_metrics).json()['views']
+        assert list(views) == ['MetricsView.delete'], (
+            'Проверьте, что DELETE сбрасывает накопленные замеры'
+        )
@@ -0,0 +1,26 @@
+import pytest
+
+
+class Test22Benchmarks:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_harness_runs(self):
+        from benchmarks.run import benchmark, compare, parse_args
+
+        options = parse_args([
+            '--titles', '20', '--users', '10', '--genres', '5',
+            '--categories', '3', '--iterations', '3',
+        ])
+        report = benchmark(options)
+        assert report['seed']['objects']['reviews'] == 100
+        assert set(report['scenarios']) == {
+            'titles_list', 'titles_filter', 'titles_retrieve', 'titles_top',
+            'reviews_list',
+            'reviews_create', 'comments_list', 'signup', 'token',
+        }
+        for name, result in report['scenarios'].items():
+            assert result['requests'] == 3
+            assert set(result['statuses']) <= {'200', '201'}, (
+                f'Проверьте, что запросы сценария `{name}` выполняются успешно'
+            )
+        assert len(compare(report, report)) == len(report['scenarios'])
@@ -0,0 +1,73 @@
+import json
+import logging
+
+import pytest
+from django.db import connection
+
+
+@pytest.fixture
+def slow_query_log(settings, tmp_path):
+    from api import slow_queries
+
+    path = tmp_path / 'logs' / 'slow.log'
+    settings.SLOW_QUERY_LOG = dict(
+        settings.SLOW_QUERY_LOG, THRESHOLD_MS=0, FILE=str(path)
+    )
+    handlers = slow_queries.logger.handlers[:]
+    slow_queries.logger.handlers.clear()
+    slow_queries.install(connection=connection)
+    yield path
+    slow_queries.uninstall(connection)
+    for handler in slow_queries.logger.handlers:
+        handler.close()
+    slow_queries.logger.handlers[:] = handlers
+
+
+def read_entries(path):
+    for handler in logging.getLogger('api.slow_queries').handlers:
+        handler.flush()
+    return [
+        json.loads(line.split(' ', 2)[2])
+        for line in path.read_text(encoding='utf-8').splitlines()
+    ]
+
+
+class Test23SlowQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_logs_view_call_site_and_plan(self, client, slow_query_log):
+        from reviews.models import Category, Title
+
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Title.objects.create(name='Фильм', year=2000, category=category)
+        response = client.get('/api/v1/titles/?category=movie&year=2000')
+        assert response.status_code == 200
+
+        entries = [
+            entry for entry in read_entries(slow_query_log)
+            if entry['view'] == 'TitleViewSet.list'
+        ]
+        assert entries, (
+            'Проверьте, что в журнал попадает вьюсет и действие, выполнившие запрос'
+        )
+        select = next(entry for entry in entries
+                      if entry['sql'].startswith('SELECT'))
+        assert select['explain'], (
+            'Проверьте, что для SELECT в журнал записывается план запроса'
+        )
+        assert select['call_site'] and all(
+            site.startswith(('api/', 'reviews/')) for site in select['call_site']
+        ), 'Проверьте, что в журнал записывается место вызова в коде проекта'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_threshold(self, settings, slow_query_log):
+        from api import slow_queries
+        from reviews.models import Genre
+
+        slow_queries.uninstall(connection)
+        settings.SLOW_QUERY_LOG = dict(settings.SLOW_QUERY_LOG, THRESHOLD_MS=10000)
+        slow_queries.install(connection=connection)
+        list(Genre.objects.all())
+        assert not slow_query_log.exists() or not read_entries(slow_query_log), (
+            'Проверьте, что быстрые запросы не записываются в журнал'
+        )
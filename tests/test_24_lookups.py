@@ -0,0 +1,126 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+LOOKUP_TABLES = ('"reviews_genre"', '"reviews_category"')
+
+
+def lookup_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if any(f'FROM {table}' in query['sql'] for table in LOOKUP_TABLES)
+    ]
+
+
+class Test24Lookups:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_write_and_read_use_cached_lookups(self, admin_client):
+        from reviews.lookups import CATEGORIES, GENRES
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        GENRES.get()
+        CATEGORIES.get()
+        data = {
+            'name': 'Поворот туда', 'year': 2000,
+            'genre': ['drama', 'comedy'], 'category': 'films',
+            'description': 'Крутое пике',
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+            assert response.status_code == 201, (
+                'Проверьте, что при POST запросе `/api/v1/titles/` '
+                'с корректными данными возвращается статус 201'
+            )
+            title_id = response.json()['id']
+            response = admin_client.get(f'/api/v1/titles/{title_id}/')
+            listing = admin_client.get('/api/v1/titles/?genre=drama')
+        assert lookup_queries(context) == [], (
+            'Проверьте, что slug жанров и категорий переводятся в id '
+            'по справочникам в памяти, без запросов к их таблицам'
+        )
+        data = response.json()
+        assert data['category'] == {'name': 'Фильм', 'slug': 'films'}, (
+            'Проверьте, что категория произведения выводится целиком'
+        )
+        assert sorted(genre['slug'] for genre in data['genre']) == [
+            'comedy', 'drama'
+        ], 'Проверьте, что жанры произведения выводятся целиком'
+        assert listing.json()['count'] == 1, (
+            'Проверьте, что фильтр по жанру работает через справочник'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_unknown_slug(self, admin_client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = {
+            'name': 'Поворот туда', 'year': 2000,
+            'genre': ['unknown'], 'category': 'films',
+        }
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что при POST запросе `/api/v1/titles/` '
+            'с несуществующим жанром возвращается статус 400'
+        )
+        assert 'genre' in response.json(), (
+            'Проверьте, что ошибка относится к полю `genre`'
+        )
+        response = admin_client.get('/api/v1/titles/?category=unknown')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что фильтр по несуществующей категории '
+            'возвращает пустой список'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_invalidated_after_change(self, admin_client):
+        from reviews.lookups import GENRES
+        from reviews.models import Genre
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = {
+            'name': 'Поворот туда', 'year': 2000,
+            'genre': ['drama'], 'category': 'films',
+        }
+        title_id = admin_client.post('/api/v1/titles/', data=data).json()['id']
+        version = GENRES.get().version
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Драма'
+        genre.save()
+        assert GENRES.get().version != version, (
+            'Проверьте, что изменение жанра сбрасывает справочник'
+        )
+        response = admin_client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json()['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ], 'Проверьте, что после изменения жанра выводится новое название'
+        admin_client.post('/api/v1/genres/', data={
+            'name': 'Новый', 'slug': 'new-genre'
+        })
+        response = admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'genre': ['new-genre']}
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что новый жанр сразу доступен для записи'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_snapshot_expires(self, settings):
+        from reviews.lookups import GENRES
+        from reviews.models import Genre
+
+        settings.LOOKUPS = {'TTL': 60}
+        GENRES.get()
+        # bulk_create не отправляет сигналы, как и изменение справочника
+        # другим процессом при кэше в памяти процесса.
+        Genre.objects.bulk_create([Genre(name='Новый', slug='new-genre')])
+        assert 'new-genre' not in GENRES.get().by_slug
+        settings.LOOKUPS = {'TTL': 0}
+        assert 'new-genre' in GENRES.get().by_slug, (
+            'Проверьте, что справочник перечитывается по истечении '
+            'LOOKUPS["TTL"], даже если версия в кэше не менялась'
+        )
@@ -0,0 +1,124 @@
+import pytest
+
+from .common import create_reviews, stats_snapshot
+
+
+def assert_matches_full_refresh(message):
+    from reviews.stats import refresh_stats
+
+    incremental = stats_snapshot()
+    refresh_stats()
+    assert incremental == stats_snapshot(), message
+
+
+class Test25TitleStats:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genre_and_category_stats(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        response = client.get('/api/v1/genres/stats/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/genres/stats/` доступен без токена'
+        )
+        stats = {row['genre']['slug']: row
+                 for row in response.json()['results']}
+        assert set(stats) == {'horror', 'comedy', 'drama'}, (
+            'Проверьте, что статистика есть у каждого жанра'
+        )
+        horror = stats['horror']
+        assert (horror['titles_count'], horror['reviews_count'],
+                horror['rating']) == (1, 3, 4.0), (
+            'Проверьте количество произведений, отзывов и среднюю оценку жанра'
+        )
+        assert [title['id'] for title in horror['top_titles']] == [
+            titles[0]['id']
+        ], 'Проверьте список лучших произведений жанра'
+        drama = stats['drama']
+        assert (drama['titles_count'], drama['rating'],
+                drama['top_titles']) == (1, None, []), (
+            'Проверьте статистику жанра без отзывов'
+        )
+        response = client.get('/api/v1/categories/stats/films/')
+        assert response.status_code == 200, (
+            'Проверьте, что статистика категории доступна по slug'
+        )
+        data = response.json()
+        assert data['category'] == {'name': 'Фильм', 'slug': 'films'}, (
+            'Проверьте, что категория выводится целиком'
+        )
+        assert (data['titles_count'], data['reviews_count'],
+                data['rating']) == (1, 3, 4.0), (
+            'Проверьте статистику категории'
+        )
+        response = admin_client.post('/api/v1/genres/stats/', data={})
+        assert response.status_code == 405, (
+            'Проверьте, что статистика доступна только для чтения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ordering(self, client, admin_client, admin):
+        create_reviews(admin_client, admin)
+        response = client.get('/api/v1/genres/stats/?ordering=-reviews_count')
+        counts = [row['reviews_count']
+                  for row in response.json()['results']]
+        assert counts == sorted(counts, reverse=True), (
+            'Проверьте сортировку статистики по `reviews_count`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_incremental_updates(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        assert_matches_full_refresh(
+            'Проверьте, что новые отзывы учитываются в статистике'
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            data={'score': 10}
+        )
+        assert_matches_full_refresh(
+            'Проверьте, что изменение оценки учитывается в статистике'
+        )
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={
+            'category': 'films', 'genre': ['horror', 'drama'],
+        })
+        assert_matches_full_refresh(
+            'Проверьте, что смена категории и жанров произведения '
+            'учитывается в статистике'
+        )
+        Review.objects.filter(author=user).delete()
+        Title.objects.get(pk=titles[1]['id']).genre.clear()
+        assert_matches_full_refresh(
+            'Проверьте, что удаление отзыва и жанров учитывается в статистике'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert_matches_full_refresh(
+            'Проверьте, что удаление произведения учитывается в статистике'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_top_titles(self, admin_client, admin, settings):
+        from reviews.models import GenreStats, Review, Title
+
+        settings.TITLE_STATS = {'TOP_SIZE': 2}
+        create_reviews(admin_client, admin)
+        category = Title.objects.first().category
+        horror = GenreStats.objects.get(genre__slug='horror')
+        for index, score in enumerate((9, 7, 2)):
+            title = Title.objects.create(name=f'Новое {index}', year=2000,
+                                         category=category)
+            title.genre.add(horror.pk)
+            Review.objects.create(title=title, author=admin, score=score,
+                                  text='Оценка')
+        horror.refresh_from_db()
+        expected = list(Title.objects.filter(
+            genre=horror.pk
+        ).order_by('-rating', 'pk').values_list('pk', flat=True)[:2])
+        assert horror.top_title_ids == expected, (
+            'Проверьте, что список лучших ограничен TOP_SIZE '
+            'и отсортирован по рейтингу'
+        )
+        assert_matches_full_refresh(
+            'Проверьте, что список лучших обновляется при новых оценках'
+        )
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+import pytest
+
+from .common import create_users_api
+
+
+def create_ranked_titles(admin_client, admin):
+    from reviews.models import Review, Title
+
+    user, moderator = create_users_api(admin_client)
+    titles = [Title.objects.create(name=f'Произведение {index}', year=2000)
+              for index in range(3)]
+    # Одна оценка 10 против трех оценок 9: байесовская оценка должна
+    # поставить выше произведение с большим числом отзывов.
+    Review.objects.create(title=titles[0], author=admin, score=10,
+                          text='Отзыв')
+    for author in (admin, user, moderator):
+        Review.objects.create(title=titles[1], author=author, score=9,
+                              text='Отзыв')
+    Review.objects.create(title=titles[2], author=admin, score=2,
+                          text='Отзыв')
+    return titles
+
+
+class Test26Rankings:
+
+    def test_01_bayesian(self):
+        from reviews.ranking import bayesian, decay_weight
+
+        assert bayesian(10, 1, 5.0, 5) < bayesian(27, 3, 5.0, 5), (
+            'Проверьте, что одна высокая оценка весит меньше нескольких'
+        )
+        assert bayesian(50, 10, 5.0, 0) == 5.0
+        assert decay_weight(3600, 3600) == 0.5, (
+            'Проверьте, что вес отзыва уменьшается вдвое за HALF_LIFE'
+        )
+        assert decay_weight(-10, 3600) == 1.0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_top(self, client, admin_client, admin):
+        from reviews.models import TitleRanking
+        from reviews.ranking import refresh_rankings
+
+        titles = create_ranked_titles(admin_client, admin)
+        assert refresh_rankings() == 3
+        assert TitleRanking.objects.count() == 3
+        response = client.get('/api/v1/titles/top/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/titles/top/` доступен без токена'
+        )
+        ids = [title['id'] for title in response.json()['results']]
+        assert ids == [titles[1].pk, titles[0].pk, titles[2].pk], (
+            'Проверьте, что `/api/v1/titles/top/` сортирует произведения '
+            'по байесовской оценке'
+        )
+        response = client.get('/api/v1/titles/top/?cursor=&limit=2')
+        data = response.json()
+        assert [title['id'] for title in data['results']] == ids[:2]
+        response = client.get(data['next'])
+        assert [title['id'] for title in response.json()['results']] == [
+            ids[2]
+        ], 'Проверьте постраничный вывод `/api/v1/titles/top/` по курсору'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_trending(self, client, admin_client, admin):
+        from django.utils import timezone
+
+        from reviews.models import Review
+        from reviews.ranking import refresh_rankings
+
+        titles = create_ranked_titles(admin_client, admin)
+        now = timezone.now()
+        Review.objects.filter(title=titles[1]).update(
+            pub_date=now - timedelta(days=3)
+        )
+        Review.objects.filter(title=titles[0]).update(
+            pub_date=now - timedelta(days=30)
+        )
+        refresh_rankings(now)
+        response = client.get('/api/v1/titles/trending/')
+        ids = [title['id'] for title in response.json()['results']]
+        assert ids == [titles[2].pk, titles[1].pk], (
+            'Проверьте, что `/api/v1/titles/trending/` учитывает только '
+            'недавние отзывы и ставит выше более свежие'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_page_queries_and_cache(self, client, admin_client, admin,
+                                       django_assert_num_queries):
+        from reviews.lookups import CATEGORIES, GENRES
+        from reviews.models import Title
+        from reviews.ranking import refresh_rankings
+
+        titles = create_ranked_titles(admin_client, admin)
+        refresh_rankings()
+        GENRES.get()
+        CATEGORIES.get()
+        # время расчета рейтинга, строки рейтинга, произведения,
+        # связи с жанрами
+        with django_assert_num_queries(4):
+            client.get('/api/v1/titles/top/?cursor=')
+        Title.objects.filter(pk=titles[2].pk).update(rating_sum=10,
+                                                     rating=10)
+        refresh_rankings()
+        response = client.get('/api/v1/titles/top/?cursor=')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что пересчет рейтингов сбрасывает кэш ответов'
+        )
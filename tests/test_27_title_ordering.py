@@ -0,0 +1,70 @@
+import pytest
+
+from .common import create_reviews
+
+
+def result_ids(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, url
+    return [title['id'] for title in response.json()['results']]
+
+
+class Test27TitleOrdering:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_ordering(self, client, admin_client, admin):
+        from reviews.models import Title
+
+        create_reviews(admin_client, admin)
+        Title.objects.create(name='Альфа', year=1990)
+        for field in ('name', 'year', 'reviews_count'):
+            for ordering in (field, f'-{field}'):
+                expected = list(Title.objects.order_by(
+                    ordering, '-id' if ordering.startswith('-') else 'id'
+                ).values_list('id', flat=True))
+                url = f'/api/v1/titles/?ordering={ordering}'
+                assert result_ids(client, url) == expected, (
+                    f'Проверьте сортировку произведений `{url}`'
+                )
+                assert result_ids(client, f'{url}&cursor=') == expected, (
+                    f'Проверьте сортировку `{url}` в режиме cursor'
+                )
+        # Место NULL в сортировке зависит от базы данных.
+        expected = list(Title.objects.order_by('-rating', '-id')
+                        .values_list('id', flat=True))
+        assert result_ids(client, '/api/v1/titles/?ordering=-rating') == (
+            expected
+        ), 'Проверьте сортировку произведений по `rating`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cursor_pages_follow_ordering(self, client, admin_client):
+        from reviews.models import Title
+
+        for index in range(5):
+            Title.objects.create(name=f'Произведение {index}',
+                                 year=2000 + index % 2)
+        expected = list(Title.objects.order_by('-year', '-id')
+                        .values_list('id', flat=True))
+        response = client.get('/api/v1/titles/?ordering=-year&cursor=&limit=2')
+        ids = []
+        while True:
+            data = response.json()
+            ids += [title['id'] for title in data['results']]
+            if not data['next']:
+                break
+            response = client.get(data['next'])
+        assert ids == expected, (
+            'Проверьте, что страницы по курсору идут в выбранном порядке'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_invalid_ordering(self, client):
+        response = client.get('/api/v1/titles/?ordering=description')
+        assert response.status_code == 200, (
+            'Проверьте, что сортировка по неразрешенному полю игнорируется'
+        )
+        response = client.get('/api/v1/titles/?ordering=rating&cursor=')
+        assert response.status_code == 400, (
+            'Проверьте, что сортировка по `rating` с cursor '
+            'возвращает статус 400'
+        )
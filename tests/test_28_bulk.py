@@ -0,0 +1,264 @@
+import pytest
+
+from .common import (create_categories, create_genre, create_reviews,
+                     create_titles, stats_snapshot)
+
+
+def bulk(client, method, url, data):
+    return getattr(client, method)(url, data=data, format='json')
+
+
+def statuses(response):
+    return [item['status'] for item in response.json()['results']]
+
+
+class Test28Bulk:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_permissions_and_limit(self, user_client, admin_client,
+                                      settings):
+        from rest_framework.test import APIClient
+
+        data = [{'name': 'Жанр', 'slug': 'genre'}]
+        response = bulk(APIClient(), 'post', '/api/v1/genres/bulk/', data)
+        assert response.status_code == 401, (
+            'Проверьте, что массовая запись недоступна без токена'
+        )
+        response = bulk(user_client, 'post', '/api/v1/genres/bulk/', data)
+        assert response.status_code == 403, (
+            'Проверьте, что массовая запись доступна только администратору'
+        )
+        settings.BULK_WRITE = {'MAX_ITEMS': 2}
+        response = bulk(admin_client, 'post', '/api/v1/genres/bulk/',
+                        data * 3)
+        assert response.status_code == 400, (
+            'Проверьте, что массив длиннее BULK_WRITE["MAX_ITEMS"] '
+            'отклоняется'
+        )
+        response = bulk(admin_client, 'post', '/api/v1/genres/bulk/',
+                        {'name': 'Жанр'})
+        assert response.status_code == 400, (
+            'Проверьте, что вместо массива возвращается статус 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_create_groups(self, client, admin_client):
+        from reviews.models import Genre, GenreStats
+
+        create_genre(admin_client)
+        data = [
+            {'name': 'Триллер', 'slug': 'thriller'},
+            {'name': 'Ужасы', 'slug': 'horror-2'},
+            {'name': 'Мюзикл', 'slug': 'horror'},
+            {'name': 'Вестерн', 'slug': 'thriller'},
+            {'name': 'Без адреса'},
+        ]
+        response = bulk(admin_client, 'post', '/api/v1/genres/bulk/', data)
+        assert response.status_code == 207, (
+            'Проверьте, что при частично успешной записи возвращается '
+            'статус 207'
+        )
+        assert statuses(response) == [201, 400, 400, 400, 400], (
+            'Проверьте, что уникальность проверяется по базе и внутри '
+            'массива, а результаты идут в порядке элементов'
+        )
+        errors = [item.get('errors') for item in response.json()['results']]
+        single = admin_client.post('/api/v1/genres/',
+                                   data={'name': 'Ужасы', 'slug': 'new'})
+        assert errors[1] == single.json(), (
+            'Проверьте, что ошибка уникальности совпадает с ошибкой '
+            'при создании одного жанра'
+        )
+        assert 'slug' in errors[4]
+        assert Genre.objects.filter(slug='thriller').exists()
+        assert GenreStats.objects.filter(genre__slug='thriller').exists(), (
+            'Проверьте, что у новых жанров создается статистика'
+        )
+        response = client.get('/api/v1/genres/?search=Триллер')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что после массовой записи кэш списка сбрасывается'
+        )
+        data = [{'name': 'Сериал', 'slug': 'series'}]
+        response = bulk(admin_client, 'post', '/api/v1/categories/bulk/',
+                        data)
+        assert response.status_code == 201
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_create_titles(self, client, admin_client,
+                              django_assert_max_num_queries):
+        from reviews.lookups import CATEGORIES, GENRES
+        from reviews.models import CategoryStats, Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        GENRES.get()
+        CATEGORIES.get()
+        data = [
+            {'name': f'Произведение {index}', 'year': 2000,
+             'genre': ['drama', 'comedy'], 'category': 'films'}
+            for index in range(50)
+        ]
+        data.append({'name': 'Произведение 0', 'year': 2000,
+                     'genre': ['drama'], 'category': 'films'})
+        data.append({'name': 'Ошибка', 'year': 2000,
+                     'genre': ['unknown'], 'category': 'films'})
+        client.get('/api/v1/titles/')
+        # Число запросов не зависит от длины массива.
+        with django_assert_max_num_queries(15):
+            response = bulk(admin_client, 'post', '/api/v1/titles/bulk/',
+                            data)
+        assert response.status_code == 207
+        assert statuses(response) == [201] * 50 + [400, 400], (
+            'Проверьте результаты массового создания произведений'
+        )
+        title_id = response.json()['results'][0]['id']
+        title = Title.objects.get(pk=title_id)
+        assert title.name == 'Произведение 0'
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ], 'Проверьте, что жанры созданы одной вставкой связей'
+        assert CategoryStats.objects.get(
+            category__slug='films'
+        ).titles_count == 50, 'Проверьте, что статистика категорий обновлена'
+        assert client.get('/api/v1/titles/').json()['count'] == 50, (
+            'Проверьте, что после массовой записи кэш списка сбрасывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_update_titles(self, admin_client, admin):
+        from reviews.stats import refresh_stats
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        first, second = titles[0]['id'], titles[1]['id']
+        data = [
+            {'id': first, 'name': 'Новое название', 'genre': ['drama']},
+            {'id': second, 'category': 'films'},
+            {'id': 10 ** 6, 'name': 'Нет такого'},
+            {'id': first, 'name': 'Повтор'},
+            {'name': 'Без id'},
+        ]
+        response = bulk(admin_client, 'patch', '/api/v1/titles/bulk/', data)
+        assert response.status_code == 207
+        assert statuses(response) == [200, 200, 404, 400, 400], (
+            'Проверьте результаты массового изменения произведений'
+        )
+        response = admin_client.get(f'/api/v1/titles/{first}/')
+        data = response.json()
+        assert data['name'] == 'Новое название'
+        assert [genre['slug'] for genre in data['genre']] == ['drama'], (
+            'Проверьте, что массовое изменение заменяет жанры'
+        )
+        assert admin_client.get(
+            f'/api/v1/titles/{second}/'
+        ).json()['category']['slug'] == 'films'
+        incremental = stats_snapshot()
+        refresh_stats()
+        assert incremental == stats_snapshot(), (
+            'Проверьте, что статистика обновляется после массового изменения'
+        )
+        response = bulk(admin_client, 'patch', '/api/v1/titles/bulk/', [
+            {'id': first, 'name': 'Проект', 'year': 2020,
+             'category': 'films'},
+        ])
+        assert response.status_code == 400, (
+            'Проверьте, что массовое изменение проверяет уникальность '
+            'названия, года и категории'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_delete(self, admin_client, admin):
+        from reviews.models import CategoryStats, Genre, Review, Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        ids = [title['id'] for title in titles]
+        response = bulk(admin_client, 'delete', '/api/v1/titles/bulk/',
+                        ids + [10 ** 6, 'x'])
+        assert statuses(response) == [204, 204, 404, 400], (
+            'Проверьте результаты массового удаления произведений'
+        )
+        assert not Title.objects.exists() and not Review.objects.exists()
+        stats = CategoryStats.objects.get(category__slug='films')
+        assert (stats.titles_count, stats.reviews_count, stats.rating) == (
+            0, 0, None
+        ), 'Проверьте, что статистика обновлена после массового удаления'
+        response = bulk(admin_client, 'delete', '/api/v1/genres/bulk/',
+                        ['horror', 'drama'])
+        assert response.status_code == 204
+        assert list(Genre.objects.values_list('slug', flat=True)) == [
+            'comedy'
+        ]
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2000, 'genre': ['horror'],
+            'category': 'films',
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что удаленные жанры пропадают из справочника'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_concurrent_duplicates(self, admin_client, monkeypatch):
+        from api import bulk as bulk_module
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        # Ключ занят параллельным запросом после предварительной проверки.
+        monkeypatch.setattr(bulk_module, 'taken_title_keys',
+                            lambda keys, exclude=(): set())
+        response = bulk(admin_client, 'post', '/api/v1/titles/bulk/', [
+            {'name': 'Проект', 'year': 2020, 'genre': ['drama'],
+             'category': 'books'},
+            {'name': 'Новое', 'year': 2001, 'genre': ['drama'],
+             'category': 'books'},
+        ])
+        assert response.status_code == 207 and statuses(response) == [
+            400, 201
+        ], (
+            'Проверьте, что конфликт по ограничению базы возвращается '
+            'ошибкой элемента, а остальные элементы записываются'
+        )
+        assert 'non_field_errors' in response.json()['results'][0]['errors']
+        assert Title.objects.filter(name='Новое').count() == 1
+        response = bulk(admin_client, 'patch', '/api/v1/titles/bulk/', [
+            {'id': titles[0]['id'], 'name': 'Проект', 'year': 2020,
+             'category': 'books'},
+        ])
+        assert statuses(response) == [400], (
+            'Проверьте, что конфликт при массовом изменении возвращается '
+            'ошибкой элемента'
+        )
+        assert Title.objects.get(pk=titles[0]['id']).name == 'Поворот туда'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_concurrent_group_duplicates(self, admin_client, monkeypatch):
+        from api import bulk as bulk_module
+        from reviews.models import Genre, GenreStats
+
+        create_genre(admin_client)
+        taken_group_values = bulk_module.taken_group_values
+        prechecks = []
+
+        def race(model, field, values):
+            # slug и имя заняты параллельным запросом после проверки.
+            if len(prechecks) < 2:
+                prechecks.append(field)
+                return set()
+            return taken_group_values(model, field, values)
+
+        monkeypatch.setattr(bulk_module, 'taken_group_values', race)
+        response = bulk(admin_client, 'post', '/api/v1/genres/bulk/', [
+            {'name': 'Ужасы', 'slug': 'thriller'},
+            {'name': 'Вестерн', 'slug': 'western'},
+            {'name': 'Другая драма', 'slug': 'drama'},
+        ])
+        assert response.status_code == 207 and statuses(response) == [
+            400, 201, 400
+        ], (
+            'Проверьте, что конфликт жанров по ограничению базы '
+            'возвращается ошибкой элемента, а остальные элементы '
+            'записываются'
+        )
+        results = response.json()['results']
+        assert 'name' in results[0]['errors']
+        assert 'slug' in results[2]['errors']
+        assert Genre.objects.filter(slug='western').exists()
+        assert GenreStats.objects.count() == Genre.objects.count() == 4
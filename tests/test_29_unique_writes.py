@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_reviews, create_titles
+
+
+def exists_queries(context, table):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith(f'SELECT (1) AS "a" FROM "{table}"')
+    ]
+
+
+class Test29UniqueWrites:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title(self, admin_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        data = {'name': 'Новое', 'year': 2000, 'genre': ['drama'],
+                'category': 'films'}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        assert exists_queries(context, 'reviews_title') == [], (
+            'Проверьте, что уникальность произведения проверяет ограничение '
+            'базы, без отдельного запроса перед вставкой'
+        )
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что при POST запросе `/api/v1/titles/` с уже '
+            'существующими названием, годом и категорией возвращается '
+            'статус 400'
+        )
+        assert response.json() == {'non_field_errors': [
+            'Поля name, year, category должны производить массив '
+            'с уникальными значениями.'
+        ]}, 'Проверьте текст ошибки уникальности произведения'
+        response = admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/',
+                                      data={'name': 'Новое'})
+        assert response.status_code == 400, (
+            'Проверьте, что изменение произведения на занятые название, '
+            'год и категорию возвращает статус 400'
+        )
+        assert Title.objects.get(pk=titles[0]['id']).name == 'Поворот туда'
+        response = admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/',
+                                      data={'year': 2001})
+        assert response.status_code == 200, (
+            'Проверьте, что произведение можно изменить, не меняя ключ '
+            'уникальности'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, user, _ = create_reviews(admin_client, admin)
+        title_id = titles[1]['id']
+        data = {'text': 'Первый', 'score': 8}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                f'/api/v1/titles/{title_id}/reviews/', data=data
+            )
+        assert response.status_code == 201
+        assert exists_queries(context, 'reviews_review') == [], (
+            'Проверьте, что уникальность отзыва проверяет ограничение '
+            'базы, без отдельного запроса перед вставкой'
+        )
+        response = admin_client.post(
+            f'/api/v1/titles/{title_id}/reviews/',
+            data={'text': 'Второй', 'score': 1}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв на произведение возвращает '
+            'статус 400'
+        )
+        assert response.json() == {'non_field_errors': [
+            'Оставлять отзыв на одно произведение дважды запрещено!'
+        ]}, 'Проверьте текст ошибки повторного отзыва'
+        title = Title.objects.get(pk=title_id)
+        assert (title.reviews_count, title.rating) == (1, 8.0), (
+            'Проверьте, что отклоненный отзыв не меняет рейтинг'
+        )